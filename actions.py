@@ -4,11 +4,15 @@ from __future__ import annotations
 from typing import Optional, Tuple, TYPE_CHECKING
 
 import color
+from entity import Item
 import exceptions
+import tile_types
 
 if TYPE_CHECKING:
     from engine import Engine
-    from entity import Actor, Entity, Item
+    from entity import Actor, Entity
+
+MELEE_NOISE_RADIUS = 5  # Dormant enemies this close to a fight wake up
 
 
 class Action:
@@ -46,12 +50,12 @@ class PickupAction(Action):
         actor_location_y = self.entity.y
         inventory = self.entity.inventory
 
-        for item in self.engine.game_map.items:
-            if actor_location_x == item.x and actor_location_y == item.y:
+        for item in self.engine.game_map.get_entities_at_location(actor_location_x, actor_location_y):
+            if isinstance(item, Item):
                 if len(inventory.items) >= inventory.capacity:
                     raise exceptions.Impossible("Your inventory is full.")
 
-                self.engine.game_map.entities.remove(item)
+                self.engine.game_map.remove_entity(item)
                 item.parent = self.entity.inventory
                 inventory.items.append(item)
 
@@ -114,11 +118,17 @@ class TakeStairsAction(Action):
     """Class for moving between levels of the dungeon"""
     def perform(self) -> None:
         """Take the stairs, if any exist at the entity's location"""
-        if (self.entity.x, self.entity.y) == self.engine.game_map.downstairs_location:
-            self.engine.game_world.generate_floor()
+        location = self.entity.x, self.entity.y
+        if location == self.engine.game_map.downstairs_location:
+            self.engine.game_world.descend()
             self.engine.message_log.add_message(
                 "You descend deeper into the unknown...", color.descend
             )
+        elif location == self.engine.game_map.upstairs_location:
+            self.engine.game_world.ascend()
+            self.engine.message_log.add_message(
+                "You climb back up the stairs...", color.descend
+            )
         else:
             raise exceptions.Impossible("There are no stairs here")
 
@@ -161,6 +171,8 @@ class MeleeAction(ActionWithDirection):
 
         damage = self.entity.fighter.strength - target.fighter.constitution
 
+        self.engine.game_map.wake_actors_near(target.x, target.y, MELEE_NOISE_RADIUS)
+
         attack_desc = f"{self.entity.name.capitalize()} attacks {target.name}"
         if self.entity is self.engine.player:
             attack_color = color.player_atk
@@ -187,10 +199,10 @@ class MovementAction(ActionWithDirection):
         if not self.engine.game_map.in_bounds(dest_x, dest_y):
             # Destination is out of bounds.
             raise exceptions.Impossible("That way is blocked.")
-        if not self.engine.game_map.tiles["walkable"][dest_x, dest_y]:
+        if not tile_types.lookup(self.engine.game_map.tiles[dest_x, dest_y], "walkable"):
             # Destination is blocked by a tile.
             raise exceptions.Impossible("That way is blocked.")
-        if self.engine.game_map.get_blocking_entity_at_location(dest_x, dest_y):
+        if self.engine.game_map.blockers[dest_x, dest_y]:
             # Destination is blocked by an entity.
             raise exceptions.Impossible("That way is blocked.")
 
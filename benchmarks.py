@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""Benchmarks of the game's hot paths, run without a window
+
+Run `python benchmarks.py <name>` with one of the names below.
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import lzma
+import os
+import pickle
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+import color
+import entity_factories
+from game_map import GameMap
+from headless import HeadlessSession
+from message_log import Message
+import savefile
+import setup_game
+import tile_types
+from simulation import descend
+
+if TYPE_CHECKING:
+    from entity import Entity
+
+
+def get_floor_locations(game_map: GameMap, count: int) -> List[Tuple[int, int]]:
+    """Return `count` walkable locations of a map, repeating them if needed"""
+    xs, ys = np.nonzero(tile_types.lookup(game_map.tiles, "walkable"))
+    indexes = np.arange(count) % len(xs)
+    return list(zip(xs[indexes].tolist(), ys[indexes].tolist()))
+
+
+def spawn_with_deepcopy(prototype: Entity, game_map: GameMap, x: int, y: int) -> None:
+    """Spawn an entity the way Entity.spawn used to, with copy.deepcopy"""
+    clone = copy.deepcopy(prototype)
+    clone.x = x
+    clone.y = y
+    clone.parent = game_map
+    game_map.add_entity(clone)
+
+
+def spawn_with_clone(prototype: Entity, game_map: GameMap, x: int, y: int) -> None:
+    """Spawn an entity with Entity.spawn"""
+    prototype.spawn(game_map, x, y)
+
+
+def benchmark_spawn(count: int) -> None:
+    """Compare the spawn throughput of prototype cloning against copy.deepcopy"""
+    spawners: Dict[str, Callable[[Entity, GameMap, int, int], None]] = {
+        "deepcopy": spawn_with_deepcopy,
+        "clone": spawn_with_clone,
+    }
+    for prototype in (entity_factories.slime, entity_factories.health_potion, entity_factories.sword):
+        for name, spawner in spawners.items():
+            engine = setup_game.new_game(seed=0)
+            game_map = engine.game_map
+            locations = get_floor_locations(game_map, count)
+
+            start_time = time.perf_counter()
+            for x, y in locations:
+                spawner(prototype, game_map, x, y)
+            elapsed = time.perf_counter() - start_time
+
+            print(
+                f"{prototype.name:>15} {name:>8}: {count / elapsed:>10.0f} spawns/second "
+                f"({elapsed * 1e6 / count:.2f} us each)"
+            )
+
+
+class DictMessage:
+    """A message with a __dict__, the way message_log.Message was before it had __slots__"""
+
+    def __init__(self, text: str, fg: Tuple[int, int, int]):
+        self.plain_text = text
+        self.fg = fg
+        self.count = 1
+
+
+def benchmark_memory(entities: int, messages: int) -> None:
+    """Measure the memory used by a floor populated with entities, and by messages with and without __slots__"""
+    engine = setup_game.new_game(seed=0)
+    game_map = engine.game_map
+    prototypes = (entity_factories.slime, entity_factories.health_potion, entity_factories.sword)
+    locations = get_floor_locations(game_map, entities)
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for i, (x, y) in enumerate(locations):
+        prototypes[i % len(prototypes)].spawn(game_map, x, y)
+    after_spawn, _ = tracemalloc.get_traced_memory()
+    print(
+        f"{entities} entities: {(after_spawn - before) / 2 ** 20:.2f} MiB "
+        f"({(after_spawn - before) / entities:.0f} bytes each)"
+    )
+
+    # The log only keeps its last messages, so the messages are measured on their own.
+    message_classes: Dict[str, Callable[[str, Tuple[int, int, int]], object]] = {
+        "with __dict__": DictMessage,
+        "with __slots__": Message,
+    }
+    for name, message_class in message_classes.items():
+        before, _ = tracemalloc.get_traced_memory()
+        kept = [message_class(f"Message number {i}", color.white) for i in range(messages)]
+        after, _ = tracemalloc.get_traced_memory()
+        print(
+            f"{messages} messages {name}: {(after - before) / 2 ** 20:.2f} MiB "
+            f"({(after - before) / messages:.0f} bytes each)"
+        )
+        del kept
+    tracemalloc.stop()
+
+
+def get_file_size(filename: str) -> int:
+    """Return the size of a file, 0 if it doesn't exist"""
+    return os.path.getsize(filename) if os.path.exists(filename) else 0
+
+
+def save_with_lzma(engine: object, filename: str) -> None:
+    """Save a game the way Engine.save_as used to, with pickle and LZMA"""
+    with open(filename, "wb") as f:
+        f.write(lzma.compress(pickle.dumps(engine)))
+
+
+def load_with_lzma(filename: str) -> object:
+    """Load a game saved by save_with_lzma"""
+    with open(filename, "rb") as f:
+        return pickle.loads(lzma.decompress(f.read()))
+
+
+def benchmark_save(repeat: int, turns: int) -> None:
+    """Compare the size, save time and load time of the save file format against pickle and LZMA,
+    and the cost of journaled saves"""
+    session = HeadlessSession(setup_game.new_game(seed=0))
+    for _ in range(turns * 10):
+        if session.turns >= turns or session.is_over:
+            break
+        session.perform(descend(session))
+    engine = session.engine
+    formats: Dict[str, Tuple[Callable[[object, str], None], Callable[[str], object]]] = {
+        "pickle+lzma": (save_with_lzma, load_with_lzma),
+        "savefile": (savefile.save, savefile.load),
+        "savefile (no mmap)": (savefile.save, lambda filename: savefile.load(filename, mmap_arrays=False)),
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "benchmark.sav")
+        for name, (save, load) in formats.items():
+            start_time = time.perf_counter()
+            for _ in range(repeat):
+                save(engine, filename)
+            save_time = (time.perf_counter() - start_time) / repeat
+
+            start_time = time.perf_counter()
+            for _ in range(repeat):
+                load(filename)
+            load_time = (time.perf_counter() - start_time) / repeat
+
+            print(
+                f"{name:>18}: {os.path.getsize(filename) / 1024:>8.1f} KiB, "
+                f"save {save_time * 1000:>7.2f} ms, load {load_time * 1000:>7.2f} ms"
+            )
+
+        # Journaled saves, one per turn, as autosaves do.
+        # The journal is compacted into a new checkpoint once it's bigger than the last one.
+        journal = savefile.JournaledSave(filename, checkpoint_interval=repeat + 1)
+        journal.write(savefile.Snapshot(engine))
+        save_time = 0.0
+        written = 0
+        checkpoints = 0
+        for _ in range(repeat):
+            session.perform(descend(session))
+            journal_size = get_file_size(journal.journal_filename)
+            start_time = time.perf_counter()
+            journal.write(savefile.Snapshot(engine))
+            save_time += time.perf_counter() - start_time
+            if get_file_size(journal.journal_filename) > journal_size:
+                written += get_file_size(journal.journal_filename) - journal_size
+            else:
+                checkpoints += 1
+                written += get_file_size(filename)
+        print(
+            f"{'journaled':>18}: {written / repeat / 1024:>8.1f} KiB per turn, "
+            f"save {save_time / repeat * 1000:>7.2f} ms, {checkpoints} checkpoints"
+        )
+
+
+def main() -> None:
+    """Run the benchmark chosen on the command line"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    spawn_parser = subparsers.add_parser("spawn", help=benchmark_spawn.__doc__)
+    spawn_parser.add_argument("--count", type=int, default=20000, help="entities to spawn")
+
+    memory_parser = subparsers.add_parser("memory", help=benchmark_memory.__doc__)
+    memory_parser.add_argument("--entities", type=int, default=30000, help="entities to spawn")
+    memory_parser.add_argument("--messages", type=int, default=100000, help="messages to create of each kind")
+
+    save_parser = subparsers.add_parser("save", help=benchmark_save.__doc__)
+    save_parser.add_argument("--repeat", type=int, default=20, help="saves and loads of each format")
+    save_parser.add_argument("--turns", type=int, default=500, help="turns played before saving")
+
+    args = parser.parse_args()
+    if args.benchmark == "spawn":
+        benchmark_spawn(args.count)
+    elif args.benchmark == "memory":
+        benchmark_memory(args.entities, args.messages)
+    elif args.benchmark == "save":
+        benchmark_save(args.repeat, args.turns)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,8 @@
 """Components relating to enemy artificial intelligence"""
 from __future__ import annotations
 
-import random
 from typing import List, Optional, Tuple, TYPE_CHECKING
 
-import numpy as np  # type: ignore
 import tcod
 
 from actions import Action, BumpAction, MeleeAction, MovementAction, WaitAction
@@ -24,17 +22,8 @@ class BaseAI(Action):
 
         If there is no valid path then returns an empty list.
         """
-        # Copy the walkable array.
-        cost = np.array(self.entity.gamemap.tiles["walkable"], dtype=np.int8)
-
-        for entity in self.entity.gamemap.entities:
-            # Check that an enitiy blocks movement and the cost isn't zero (blocking.)
-            if entity.blocks_movement and cost[entity.x, entity.y]:
-                # Add to the cost of a blocked position.
-                # A lower number means more enemies will crowd behind each other in
-                # hallways.  A higher number means enemies will take longer paths in
-                # order to surround the player.
-                cost[entity.x, entity.y] += 10
+        # Walkable tiles, with an extra cost for the ones occupied by a blocking entity.
+        cost = self.entity.gamemap.pathing_cost
 
         # Create a graph from the cost array and pass that graph to a new pathfinder.
         graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
@@ -48,6 +37,20 @@ class BaseAI(Action):
         # Convert from List[List[int]] to List[Tuple[int, int]].
         return [(index[0], index[1]) for index in path]
 
+    def get_path_to_player(self) -> List[Tuple[int, int]]:
+        """Return a path to the player by walking down the engine's shared distance map.
+
+        This is much cheaper than `get_path_to` since the map is only computed once per turn.
+        If there is no valid path then returns an empty list.
+        """
+        # Walk downhill from the start position and remove the starting point.
+        path: List[List[int]] = tcod.path.hillclimb2d(
+            self.engine.player_distance, (self.entity.x, self.entity.y), True, True
+        )[1:].tolist()
+
+        # Convert from List[List[int]] to List[Tuple[int, int]].
+        return [(index[0], index[1]) for index in path]
+
 
 class ConfusedEnemy(BaseAI):
     """A confused enemy will stumble around aimlessly for a given number of turns, then revert back to its previous AI.
@@ -66,7 +69,7 @@ class ConfusedEnemy(BaseAI):
             self.entity.ai = self.previous_ai
         else:
             # Pick a random direction
-            direction_x, direction_y = random.choice(
+            direction_x, direction_y = self.engine.game_world.get_rng("ai").choice(
                 [
                     (-1, -1),  # Northwest
                     (0, -1),  # North
@@ -103,7 +106,7 @@ class HostileEnemy(BaseAI):
             if distance <= 1:
                 return MeleeAction(self.entity, dx, dy).perform()
 
-            self.path = self.get_path_to(target.x, target.y)
+            self.path = self.get_path_to_player()
 
         if self.path:
             dest_x, dest_y = self.path.pop(0)
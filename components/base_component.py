@@ -1,16 +1,36 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
+import copy
+from typing import Any, TypeVar, TYPE_CHECKING
+
+from pickling import restore_slots
 
 if TYPE_CHECKING:
     from engine import Engine
     from entity import Entity
     from game_map import GameMap
 
+T = TypeVar("T", bound="BaseComponent")
+
 
 class BaseComponent:
     """Base component for every other component classes"""
+
+    __slots__ = ("parent",)
+
     parent: Entity  # Owning entity instance
 
+    def __setstate__(self, state: Any) -> None:
+        """Restore a component, including one saved before components had __slots__"""
+        restore_slots(self, state)
+
+    def clone(self: T) -> T:
+        """Return a copy of this component for a new entity, which must then set itself as its parent.
+
+        Components only hold plain values by default, so a shallow copy is enough.
+        Components holding other entities override this.
+        """
+        return copy.copy(self)
+
     @property
     def gamemap(self) -> GameMap:
         """Gamemap instance used for components"""
@@ -27,6 +27,9 @@ if TYPE_CHECKING:
 
 class Consumable(BaseComponent):
     """Base class for characteristics shared by all consumables"""
+
+    __slots__ = ()
+
     parent: Item
 
     def get_action(self, consumer: Actor) -> Optional[ActionOrHandler]:
@@ -50,6 +53,9 @@ class Consumable(BaseComponent):
 
 class ConfusionConsumable(Consumable):
     """Class for a scroll that causes an enemy to be confused for x number of turns"""
+
+    __slots__ = ("number_of_turns",)
+
     def __init__(self, number_of_turns: int):
         self.number_of_turns = number_of_turns
 
@@ -85,6 +91,9 @@ class ConfusionConsumable(Consumable):
 
 class LightningDamageConsumable(Consumable):
     """Class for a scroll that damages the nearest enemy"""
+
+    __slots__ = ("damage", "maximum_range")
+
     def __init__(self, damage: int, maximum_range: int):
         self.damage = damage
         self.maximum_range = maximum_range
@@ -92,16 +101,14 @@ class LightningDamageConsumable(Consumable):
     def activate(self, action: actions.ItemAction) -> None:
         """Activation of the scroll"""
         consumer = action.entity
-        target = None
-        closest_distance = self.maximum_range + 1.0
-
-        for actor in self.engine.game_map.actors:
-            if actor is not consumer and self.parent.gamemap.visible[actor.x, actor.y]:
-                distance = consumer.distance(actor.x, actor.y)
-
-                if distance < closest_distance:
-                    target = actor
-                    closest_distance = distance
+        game_map = self.engine.game_map
+        target = game_map.store.nearest_actor(
+            consumer.x,
+            consumer.y,
+            max_distance=self.maximum_range + 1.0,
+            visible=game_map.visible,
+            exclude=consumer,
+        )
 
         if target:
             self.engine.message_log.add_message(
@@ -115,6 +122,9 @@ class LightningDamageConsumable(Consumable):
 
 class FireballDamageConsumable(Consumable):
     """Class for a scroll that damages everything in the selected area"""
+
+    __slots__ = ("damage", "radius")
+
     def __init__(self, damage: int, radius: int):
         self.damage = damage
         self.radius = radius
@@ -135,22 +145,23 @@ class FireballDamageConsumable(Consumable):
         if not self.engine.game_map.visible[target_xy]:
             raise Impossible("You cannot target an area that you cannot see")
 
-        targets_hit = False
-        for actor in self.engine.game_map.actors:
-            if actor.distance(*target_xy) <= self.radius:
-                self.engine.message_log.add_message(
-                    f"The {actor.name} is engulfed in a fiery explosion, taking {self.damage} damage"
-                )
-                actor.fighter.take_damage(self.damage)
-                targets_hit = True
+        targets = self.engine.game_map.store.actors_within(*target_xy, self.radius)
+        for actor in targets:
+            self.engine.message_log.add_message(
+                f"The {actor.name} is engulfed in a fiery explosion, taking {self.damage} damage"
+            )
+            actor.fighter.take_damage(self.damage)
 
-        if not targets_hit:
+        if not targets:
             raise Impossible("There are no targets in the radius")
         self.consume()
 
 
 class HealingConsumable(Consumable):
     """Class for an healing potion"""
+
+    __slots__ = ("amount",)
+
     def __init__(self, amount: int):
         self.amount = amount
 
@@ -171,6 +182,9 @@ class HealingConsumable(Consumable):
 
 class InscriberConsumable(Consumable):
     """Class for all inscribers"""
+
+    __slots__ = ("effect",)
+
     def __init__(self, effect: ModifierFx):
         self.effect = effect
 
@@ -6,7 +6,7 @@ Equipments include:
 -Armors
 """
 from __future__ import annotations
-from typing import Optional, TYPE_CHECKING
+from typing import Dict, Optional, TYPE_CHECKING
 from components.base_component import BaseComponent
 from equipment_types import EquipmentType
 
@@ -16,6 +16,11 @@ if TYPE_CHECKING:
 
 class Equipment(BaseComponent):
     """Base class for equipments"""
+
+    __slots__ = (
+        "left_hnd_wpn", "right_hnd_wpn", "body_armor", "head_armor", "gloves", "boots", "accessory"
+    )
+
     parent: Actor
 
     def __init__(self,
@@ -36,6 +41,23 @@ class Equipment(BaseComponent):
         self.accessory = accessory
 # TODO: Modify useless equipment names and add others that are missing
 
+    def clone(self, items: Optional[Dict[Item, Item]] = None) -> Equipment:
+        """Return a copy of this equipment.
+
+        `items` maps the equipped items to the items to equip in the copy instead,
+        usually the copies of the owner's inventory.  Unmapped items are left unequipped.
+        """
+        items = items or {}
+        return Equipment(
+            left_hnd_wpn=items.get(self.left_hnd_wpn),
+            right_hnd_wpn=items.get(self.right_hnd_wpn),
+            body_armor=items.get(self.body_armor),
+            head_armor=items.get(self.head_armor),
+            gloves=items.get(self.gloves),
+            boots=items.get(self.boots),
+            accessory=items.get(self.accessory),
+        )
+
     @property
     def defense_bonus(self) -> int:
         """Defense bonus given by the equipped item"""
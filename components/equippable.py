@@ -10,6 +10,11 @@ if TYPE_CHECKING:
 
 class Equippable(BaseComponent):
     """Base class of equippable items"""
+
+    __slots__ = (
+        "equipment_type", "power_bonus", "defense_bonus", "evasion_bonus", "intelligence_bonus"
+    )
+
     parent: Item
 
     def __init__(
@@ -30,6 +35,8 @@ class Equippable(BaseComponent):
 class Dagger(Equippable):
     """Characteristics of an instance of a DAGGER weapon"""
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(equipment_type=EquipmentType.LEFT_HAND_WPN, power_bonus=2)
 
@@ -37,6 +44,8 @@ class Dagger(Equippable):
 class Sword(Equippable):
     """Characteristics of an instance of a SWORD weapon"""
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(equipment_type=EquipmentType.RIGHT_HAND_WPN, power_bonus=4)
 
@@ -44,6 +53,8 @@ class Sword(Equippable):
 class LeatherArmor(Equippable):
     """Characteristics of an instance of a LEATHER ARMOR"""
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(equipment_type=EquipmentType.BODY_ARMOR, defense_bonus=1)
 
@@ -51,5 +62,7 @@ class LeatherArmor(Equippable):
 class ChainMail(Equippable):
     """Characteristics of an instance of a CHAIN MAIL ARMOR"""
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(equipment_type=EquipmentType.BODY_ARMOR, defense_bonus=3)
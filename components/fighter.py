@@ -13,6 +13,11 @@ if TYPE_CHECKING:
 
 class Fighter(BaseComponent):
     """Base fighter class"""
+
+    __slots__ = (
+        "max_hp", "_hp", "base_constitution", "base_strength", "base_agility", "base_intelligence"
+    )
+
     parent: Actor
 
     def __init__(self, hp: int, base_constitution: int, base_strength: int, base_agility: int, base_intelligence: int):
@@ -23,6 +28,18 @@ class Fighter(BaseComponent):
         self.base_agility = base_agility
         self.base_intelligence = base_intelligence
 
+    def clone(self) -> Fighter:
+        """Return a copy of these stats"""
+        fighter = Fighter(
+            hp=self.max_hp,
+            base_constitution=self.base_constitution,
+            base_strength=self.base_strength,
+            base_agility=self.base_agility,
+            base_intelligence=self.base_intelligence,
+        )
+        fighter._hp = self._hp
+        return fighter
+
     @property
     def hp(self) -> int:
         """Character's health"""
@@ -30,9 +47,12 @@ class Fighter(BaseComponent):
 
     @hp.setter
     def hp(self, value: int) -> None:
+        if value < self._hp:
+            self.gamemap.scheduler.wake(self.parent)  # Getting hurt wakes you up.
         self._hp = max(0, min(value, self.max_hp))
         if self._hp == 0 and self.parent.ai:
             self.die()
+        self.gamemap.store.update_fighter(self.parent)
 
     @property
     def constitution(self) -> int:
@@ -101,6 +121,7 @@ class Fighter(BaseComponent):
         self.parent.color = (191, 0, 0)
         self.parent.blocks_movement = False
         self.parent.ai = None
+        self.gamemap.scheduler.remove(self.parent)
         self.parent.name = f"remains of {self.parent.name}"
         self.parent.render_order = RenderOrder.CORPSE
 
@@ -11,12 +11,24 @@ if TYPE_CHECKING:
 
 class Inventory(BaseComponent):
     """Base class of an entity's inventory"""
+
+    __slots__ = ("capacity", "items")
+
     parent: Actor
 
     def __init__(self, capacity: int):
         self.capacity = capacity
         self.items: List[Item] = []
 
+    def clone(self) -> Inventory:
+        """Return a copy of this inventory, holding copies of its items"""
+        inventory = Inventory(self.capacity)
+        for item in self.items:
+            item_clone = item.clone()
+            item_clone.parent = inventory
+            inventory.items.append(item_clone)
+        return inventory
+
     def drop(self, item: Item) -> None:
         """
         Removes an item from the inventory and restores it to the game map, at the player's current location.
@@ -11,6 +11,9 @@ if TYPE_CHECKING:
 
 class Level(BaseComponent):
     """Base class for a character's level"""
+
+    __slots__ = ("current_level", "current_xp", "level_up_base", "level_up_factor", "xp_given")
+
     parent: Actor
 
     def __init__(
@@ -27,6 +30,16 @@ class Level(BaseComponent):
         self.level_up_factor = level_up_factor
         self.xp_given = xp_given
 
+    def clone(self) -> Level:
+        """Return a copy of this level"""
+        return Level(
+            current_level=self.current_level,
+            current_xp=self.current_xp,
+            level_up_base=self.level_up_base,
+            level_up_factor=self.level_up_factor,
+            xp_given=self.xp_given,
+        )
+
     @property
     def experience_to_next_level(self) -> int:
         """Defines the exp required to level up"""
@@ -12,12 +12,18 @@ if TYPE_CHECKING:
 
 class ModifierFx(BaseComponent):
     """Base class for modifier effects"""
+
+    __slots__ = ("rarity",)
+
     def __init__(self, rarity: Rarity):
         self.rarity = rarity
 
 
 class EnemyModifierFx(ModifierFx):
     """Class for basic enemy modifiers. TODO: Start with secondary mods"""
+
+    __slots__ = ("enemy",)
+
     def __init__(self, rarity: Rarity, enemy: Actor):
         super().__init__(rarity)
         self.enemy = enemy
@@ -25,6 +31,9 @@ class EnemyModifierFx(ModifierFx):
 
 class ItemsModifierFx(ModifierFx):
     """Class for basic item modifiers"""
+
+    __slots__ = ("item",)
+
     def __init__(self, rarity: Rarity, item: Item):
         super().__init__(rarity)
         self.item = item
@@ -1,16 +1,20 @@
 """Defines the game's engine and functions"""
 from __future__ import annotations
 
-import lzma
-import pickle
-from typing import TYPE_CHECKING
+import concurrent.futures
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
 
+import numpy as np  # type: ignore
 from tcod.console import Console
 from tcod.map import compute_fov
+import tcod.path
 
 import exceptions
 from message_log import MessageLog
 import render_functions
+import savefile
+import tile_types
+from turn_scheduler import action_delay
 
 if TYPE_CHECKING:
     from entity import Actor
@@ -26,25 +30,115 @@ class Engine:
         self.message_log = MessageLog()
         self.mouse_location = (0, 0)
         self.player = player
+        self._player_distance: Optional[np.ndarray] = None
+        # What the last FOV was computed from, and the area it covered
+        self._fov_key: Optional[Tuple[GameMap, int, int, int, int]] = None
+        self._fov_window: Tuple[slice, slice] = (slice(0), slice(0))
+        self.turn = 0  # Number of turns the player has played
+        # If a filename is set then the game is saved in the background every `autosave_interval` turns
+        self.autosave_filename: Optional[str] = None
+        self.autosave_interval = 100
+
+    def __setstate__(self, state: dict) -> None:
+        """Give engines saved before turns were counted the attributes added since.
+
+        Their maps are only finished here, once every entity of the save is loaded.
+        """
+        legacy = "turn" not in state
+        if legacy:
+            state.update(
+                _player_distance=None,
+                _fov_key=None,
+                _fov_window=(slice(0), slice(0)),
+                turn=0,
+                autosave_filename=None,
+                autosave_interval=100,
+            )
+        self.__dict__.update(state)
+        if legacy:
+            self.game_map.add_legacy_entities()
 
     def handle_enemy_turns(self) -> None:
-        """Make every enemy take a turn"""
-        for entity in set(self.game_map.actors) - {self.player}:
-            if entity.ai:
-                try:
-                    entity.ai.perform()
-                except exceptions.Impossible:
-                    pass  # Ignore impossible action exceptions from AI.
+        """Make every enemy due to act during the player's last action take a turn
+
+        Enemies out of the player's reach are put to sleep instead, and those which
+        came back within reach are woken up.
+        """
+        self._player_distance = None  # Computed again on first use this turn.
+        activity_radius = self.game_world.activity_radius
+        self.game_map.wake_actors_near(
+            self.player.x, self.player.y, activity_radius, self.game_map.explored
+        )
+
+        scheduler = self.game_map.scheduler
+        for entity in scheduler.advance(action_delay(self.player)):
+            if (
+                    max(abs(entity.x - self.player.x), abs(entity.y - self.player.y)) > activity_radius
+                    or not self.game_map.explored[entity.x, entity.y]
+            ):
+                scheduler.sleep(entity)
+                continue
+            try:
+                entity.ai.perform()
+            except exceptions.Impossible:
+                pass  # Ignore impossible action exceptions from AI.
+        self._player_distance = None
+
+    @property
+    def player_distance(self) -> np.ndarray:
+        """Distance from every tile of the map to the player, for the current enemy turn.
+
+        This Dijkstra map is computed at most once per turn and is shared by every AI
+        which wants to walk to the player.  Unreachable tiles hold the maximum int32 value.
+        """
+        if self._player_distance is None:
+            distance = tcod.path.maxarray(
+                (self.game_map.width, self.game_map.height), dtype=np.int32, order="F"
+            )
+            distance[self.player.x, self.player.y] = 0
+            tcod.path.dijkstra2d(distance, self.game_map.pathing_cost, 2, 3, out=distance)
+            self._player_distance = distance
+        return self._player_distance
 
     def update_fov(self) -> None:
-        """Recompute the visible area based on the players point of view."""
-        self.game_map.visible[:] = compute_fov(
-            self.game_map.tiles["transparent"],
-            (self.player.x, self.player.y),
-            radius=8,
+        """Recompute the visible area based on the players point of view.
+
+        Nothing is done if the map, its transparency and the player's position
+        haven't changed since the last call.
+        """
+        radius = 8
+        game_map = self.game_map
+        x, y = self.player.x, self.player.y
+        fov_key = (game_map, game_map.transparency_version, x, y, radius)
+        if fov_key == self._fov_key:
+            return
+
+        if self._fov_key is not None and self._fov_key[0] is game_map:
+            game_map.visible[self._fov_window] = False  # Only this area could be visible.
+            game_map.invalidate_graphics(self._fov_window)
+        else:
+            game_map.visible[:] = False
+            game_map.invalidate_graphics()
+
+        # Nothing outside of the FOV radius can be visible, so only compute this area.
+        x1, x2 = max(0, x - radius), min(game_map.width, x + radius + 1)
+        y1, y2 = max(0, y - radius), min(game_map.height, y + radius + 1)
+        window = slice(x1, x2), slice(y1, y2)
+        visible = compute_fov(
+            tile_types.lookup(game_map.tiles[window], "transparent"),
+            (x - x1, y - y1),
+            radius=radius,
         )
+        game_map.visible[window] = visible
         # If a tile is "visible" it should be added to "explored".
-        self.game_map.explored |= self.game_map.visible
+        game_map.explored[window] |= visible
+        game_map.invalidate_graphics(window)
+
+        self._fov_key = fov_key
+        self._fov_window = window
+
+        # Enemies seen by the player wake up.
+        game_map.wake_actors_near(x, y, radius, game_map.visible)
 
     def render(self, console: Console) -> None:
         """Renders game information on the screen"""
@@ -65,12 +159,46 @@ class Engine:
             location=(0, 47),
         )
 
+        render_functions.render_save_status(
+            console=console, status=savefile.background_saver.status, location=(0, 48)
+        )
+
         render_functions.render_names_at_mouse_location(
             console=console, x=21, y=44, engine=self
         )
 
+    def end_turn(self) -> None:
+        """Count a turn played by the player, and autosave if it's time to.
+
+        A game the player has lost isn't saved.
+        """
+        self.turn += 1
+        if (
+                self.player.is_alive
+                and self.autosave_filename is not None
+                and self.autosave_interval > 0
+                and self.turn % self.autosave_interval == 0
+        ):
+            self.save_in_background(self.autosave_filename)
+
+    def get_save_metadata(self) -> Dict[str, int]:
+        """Return what is saved in the header of save files, see savefile.read_metadata"""
+        return dict(
+            floor=self.game_world.current_floor,
+            level=self.player.level.current_level,
+            turn=self.turn,
+        )
+
     def save_as(self, filename: str) -> None:
-        """Save this Engine instance as a compressed file"""
-        save_data = lzma.compress(pickle.dumps(self))
-        with open(filename, "wb") as f:
-            f.write(save_data)
+        """Save this Engine instance as a save file"""
+        savefile.save(self, filename, **self.get_save_metadata())
+
+    def save_in_background(self, filename: str) -> concurrent.futures.Future:
+        """Save this Engine instance as it is now, while the game goes on.
+
+        Only what changed since the last save to this file is written, see savefile.JournaledSave.
+        The file is written by savefile.background_saver, which can be asked whether it's done.
+        """
+        return savefile.background_saver.save(
+            self, filename, journaled=True, **self.get_save_metadata()
+        )
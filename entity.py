@@ -6,11 +6,12 @@ Entities are:
 """
 from __future__ import annotations
 
-import copy
 import math
-from typing import Optional, Tuple, Type, TypeVar, TYPE_CHECKING, Union
+from typing import Any, Optional, Tuple, Type, TypeVar, TYPE_CHECKING, Union
 
+from pickling import restore_slots
 from render_order import RenderOrder
+from turn_scheduler import NORMAL_SPEED
 
 if TYPE_CHECKING:
     from components.ai import BaseAI
@@ -31,6 +32,8 @@ class Entity:
     A generic object to represent players, enemies, items, etc.
     """
 
+    __slots__ = ("parent", "x", "y", "char", "color", "name", "_blocks_movement", "_render_order")
+
     parent: Union[GameMap, Inventory]
 
     def __init__(
@@ -49,37 +52,83 @@ class Entity:
         self.char = char
         self.color = color
         self.name = name
-        self.blocks_movement = blocks_movement
-        self.render_order = render_order
+        self._blocks_movement = blocks_movement
+        self._render_order = render_order
         if parent:
             # If parent isn't provided now then it will be set later.
             self.parent = parent
-            parent.entities.add(self)
+            parent.add_entity(self)
+
+    def __setstate__(self, state: Any) -> None:
+        """Restore an entity, including one saved before entities had __slots__"""
+        restore_slots(
+            self, state, {"blocks_movement": "_blocks_movement", "render_order": "_render_order"}
+        )
 
     @property
     def gamemap(self) -> GameMap:
         """The current map to use"""
         return self.parent.gamemap
 
+    @property
+    def blocks_movement(self) -> bool:
+        """True if other entities can't move onto this entity's tile"""
+        return self._blocks_movement
+
+    @blocks_movement.setter
+    def blocks_movement(self, value: bool) -> None:
+        if self._is_on_gamemap():
+            self.gamemap.update_entity_blocking(self, value)
+        self._blocks_movement = value
+
+    @property
+    def render_order(self) -> RenderOrder:
+        """When this entity is drawn compared to the others, higher orders are drawn on top"""
+        return self._render_order
+
+    @render_order.setter
+    def render_order(self, value: RenderOrder) -> None:
+        if self._is_on_gamemap():
+            self.gamemap.update_entity_render_order(self, value)
+        self._render_order = value
+
+    def clone(self: T) -> T:
+        """Return a copy of this entity and its components, not placed anywhere.
+
+        This builds the copy directly from its constructor, which is much faster than copy.deepcopy.
+        """
+        return Entity(
+            x=self.x,
+            y=self.y,
+            char=self.char,
+            color=self.color,
+            name=self.name,
+            blocks_movement=self.blocks_movement,
+            render_order=self.render_order,
+        )
+
     def spawn(self: T, gamemap: GameMap, x: int, y: int) -> T:
         """Spawn a copy of this instance at the given location."""
-        clone = copy.deepcopy(self)
+        clone = self.clone()
         clone.x = x
         clone.y = y
         clone.parent = gamemap
-        gamemap.entities.add(clone)
+        gamemap.add_entity(clone)
         return clone
 
     def place(self, x: int, y: int, gamemap: Optional[GameMap] = None) -> None:
         """Place this entitiy at a new location.  Handles moving across GameMaps."""
-        self.x = x
-        self.y = y
         if gamemap:
-            if hasattr(self, "parent"):  # Possibly uninitialized.
-                if self.parent is self.gamemap:
-                    self.gamemap.entities.remove(self)
+            if self._is_on_gamemap():  # Parent possibly uninitialized.
+                self.gamemap.remove_entity(self)
+            self.x = x
+            self.y = y
             self.parent = gamemap
-            gamemap.entities.add(self)
+            gamemap.add_entity(self)
+        else:
+            self.x = x
+            self.y = y
+            self._update_location_index()
 
     def distance(self, x: int, y: int) -> float:
         """Return the distance between the current entity and the given (x, y) coordinate"""
@@ -89,11 +138,23 @@ class Entity:
         """Move the entity by a given amount"""
         self.x += dx
         self.y += dy
+        self._update_location_index()
+
+    def _is_on_gamemap(self) -> bool:
+        """True if this entity lies directly on a map, rather than in an inventory or nowhere."""
+        return hasattr(self, "parent") and self.parent is self.gamemap
+
+    def _update_location_index(self) -> None:
+        """Keep the location index of the map this entity lies on up to date."""
+        if self._is_on_gamemap():
+            self.gamemap.update_entity_location(self)
 
 
 class Actor(Entity):
     """Base class defining any player/enemy"""
 
+    __slots__ = ("ai_cls", "ai", "primary_mod", "speed", "fighter", "inventory", "equipment", "level")
+
     def __init__(
             self,
             *,
@@ -108,6 +169,7 @@ class Actor(Entity):
             fighter: Fighter,
             inventory: Inventory,
             level: Level,
+            speed: int = NORMAL_SPEED,
     ):
         super().__init__(
             x=x,
@@ -119,10 +181,13 @@ class Actor(Entity):
             render_order=RenderOrder.ACTOR,
         )
 
+        self.ai_cls = ai_cls
         self.ai: Optional[BaseAI] = ai_cls(self)
 
         self.primary_mod = primary_mod
 
+        self.speed = speed  # How often this actor acts, see turn_scheduler
+
         self.fighter = fighter
         self.fighter.parent = self
 
@@ -135,15 +200,48 @@ class Actor(Entity):
         self.level = level
         self.level.parent = self
 
+    def __setstate__(self, state: Any) -> None:
+        """Restore an actor, actors saved before they had a speed and an AI class get the defaults"""
+        super().__setstate__(state)
+        if not hasattr(self, "speed"):
+            self.speed = NORMAL_SPEED
+        if not hasattr(self, "ai_cls"):
+            from components.ai import HostileEnemy
+            self.ai_cls = HostileEnemy
+
     @property
     def is_alive(self) -> bool:
         """Returns True as long as this actor can perform actions."""
         return bool(self.ai)
 
+    def clone(self) -> Actor:
+        """Return a copy of this actor, its components and the items it carries.
+        The copy starts with a new instance of its original AI class."""
+        inventory = self.inventory.clone()
+        equipment = self.equipment.clone(dict(zip(self.inventory.items, inventory.items)))
+        return Actor(
+            x=self.x,
+            y=self.y,
+            char=self.char,
+            color=self.color,
+            name=self.name,
+            primary_mod=self.primary_mod,
+            ai_cls=self.ai_cls,
+            equipment=equipment,
+            fighter=self.fighter.clone(),
+            inventory=inventory,
+            level=self.level.clone(),
+            speed=self.speed,
+        )
+
 
 class Item(Entity):
     """Base class defining any items"""
 
+    __slots__ = (
+        "consumable", "equippable", "inscription_slots", "inscription_slot1", "inscription_slot2"
+    )
+
     def __init__(
             self,
             *,
@@ -181,3 +279,18 @@ class Item(Entity):
         self.inscription_slots = inscription_slots
         self.inscription_slot1 = inscription_slot1
         self.inscription_slot2 = inscription_slot2
+
+    def clone(self) -> Item:
+        """Return a copy of this item and its components"""
+        return Item(
+            x=self.x,
+            y=self.y,
+            char=self.char,
+            color=self.color,
+            name=self.name,
+            consumable=self.consumable.clone() if self.consumable else None,
+            equippable=self.equippable.clone() if self.equippable else None,
+            inscription_slots=self.inscription_slots,
+            inscription_slot1=self.inscription_slot1,
+            inscription_slot2=self.inscription_slot2,
+        )
@@ -0,0 +1,157 @@
+"""File defining the columnar store of a map's entities"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+from entity import Actor
+from render_order import RenderOrder
+
+if TYPE_CHECKING:
+    from entity import Entity
+
+
+class EntityStore:
+    """Struct-of-arrays copy of the state of a map's entities, one row per entity.
+
+    The map keeps the rows up to date as its entities move, die or change, so that
+    queries over many entities can be done with array operations instead of Python loops.
+    Rows are reused once their entity leaves, and queries return entities in row order.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.entities: List[Optional[Entity]] = []  # Entity of each row, None for free rows
+        self._rows: Dict[Entity, int] = {}
+        self._free_rows: List[int] = []
+
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.hp = np.zeros(capacity, dtype=np.int32)
+        self.max_hp = np.zeros(capacity, dtype=np.int32)
+        self.render_order = np.zeros(capacity, dtype=np.int8)
+        self.in_use = np.zeros(capacity, dtype=bool)  # False for free rows
+        self.alive = np.zeros(capacity, dtype=bool)  # True for the rows of living actors
+
+    def __setstate__(self, state: dict) -> None:
+        """Stores saved before rows had an in_use column get one from their entities"""
+        state.pop("blocks_movement", None)
+        if "in_use" not in state:
+            state["in_use"] = np.zeros(len(state["x"]), dtype=bool)
+            state["in_use"][: len(state["entities"])] = [
+                entity is not None for entity in state["entities"]
+            ]
+        self.__dict__.update(state)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _columns(self) -> List[str]:
+        """Names of the array attributes"""
+        return ["x", "y", "hp", "max_hp", "render_order", "in_use", "alive"]
+
+    def add(self, entity: Entity) -> None:
+        """Give an entity a row, filled from its current state."""
+        if self._free_rows:
+            row = self._free_rows.pop()
+            self.entities[row] = entity
+        else:
+            row = len(self.entities)
+            if row == len(self.x):  # Out of space, double the size of every column.
+                for name in self._columns():
+                    column = getattr(self, name)
+                    setattr(self, name, np.concatenate([column, np.zeros_like(column)]))
+            self.entities.append(entity)
+        self._rows[entity] = row
+
+        self.x[row] = entity.x
+        self.y[row] = entity.y
+        self.render_order[row] = entity.render_order.value
+        self.in_use[row] = True
+        self.update_fighter(entity)
+
+    def remove(self, entity: Entity) -> None:
+        """Free the row of an entity."""
+        row = self._rows.pop(entity)
+        self.entities[row] = None
+        self.in_use[row] = False
+        self.alive[row] = False
+        self._free_rows.append(row)
+
+    def update_location(self, entity: Entity) -> None:
+        """Copy the current location of an entity into its row."""
+        row = self._rows[entity]
+        self.x[row] = entity.x
+        self.y[row] = entity.y
+
+    def update_fighter(self, entity: Entity) -> None:
+        """Copy the hit points and living state of an entity into its row, if it has any."""
+        row = self._rows.get(entity)
+        if row is None:
+            return
+        if isinstance(entity, Actor):
+            self.hp[row] = entity.fighter.hp
+            self.max_hp[row] = entity.fighter.max_hp
+            self.alive[row] = entity.is_alive
+        else:
+            self.hp[row] = self.max_hp[row] = 0
+            self.alive[row] = False
+
+    def set_render_order(self, entity: Entity, render_order: int) -> None:
+        """Set the render_order column of an entity."""
+        self.render_order[self._rows[entity]] = render_order
+
+    def _select(self, mask: np.ndarray) -> List[Entity]:
+        """Return the entities of the rows where mask is True."""
+        return [self.entities[row] for row in np.flatnonzero(mask)]
+
+    def _distances(self, x: int, y: int) -> np.ndarray:
+        """Return the distance of every row from the given location."""
+        size = len(self.entities)
+        return np.hypot(self.x[:size] - x, self.y[:size] - y)
+
+    def visible_in_render_order(self, visible: np.ndarray) -> List[Entity]:
+        """Return the entities standing on a True tile of `visible`, in the order they should be drawn.
+
+        The rows are masked once per render order, lowest first, so nothing is sorted.
+        """
+        size = len(self.entities)
+        shown = self.in_use[:size] & visible[self.x[:size], self.y[:size]]
+        render_order = self.render_order[:size]
+        entities: List[Entity] = []
+        for order in RenderOrder:
+            entities += self._select(shown & (render_order == order.value))
+        return entities
+
+    def living_actors(self) -> List[Actor]:
+        """Return every living actor."""
+        return self._select(self.alive[: len(self.entities)])
+
+    def actors_within(self, x: int, y: int, radius: float) -> List[Actor]:
+        """Return the living actors at most `radius` away from the given location."""
+        size = len(self.entities)
+        return self._select(self.alive[:size] & (self._distances(x, y) <= radius))
+
+    def nearest_actor(
+            self,
+            x: int,
+            y: int,
+            max_distance: float,
+            visible: Optional[np.ndarray] = None,
+            exclude: Optional[Entity] = None,
+    ) -> Optional[Actor]:
+        """Return the living actor closest to the given location, if it is closer than `max_distance`.
+
+        If `visible` is given then only actors standing on a True tile of it are considered.
+        """
+        size = len(self.entities)
+        candidates = self.alive[:size].copy()
+        if visible is not None:
+            candidates &= visible[self.x[:size], self.y[:size]]
+        if exclude is not None and exclude in self._rows:
+            candidates[self._rows[exclude]] = False
+
+        distances = np.where(candidates, self._distances(x, y), np.inf)
+        if not size or distances.min() >= max_distance:
+            return None
+        return self.entities[int(distances.argmin())]
@@ -0,0 +1,169 @@
+"""File defining the store of the floors the player isn't on"""
+from __future__ import annotations
+
+import collections
+import hashlib
+import io
+import os
+import pickle
+import shutil
+import tempfile
+from typing import Any, BinaryIO, Dict, Optional, OrderedDict, Set, Tuple, TYPE_CHECKING
+import weakref
+import zlib
+
+import savefile
+
+if TYPE_CHECKING:
+    import random
+
+    from engine import Engine
+    from game_map import GameMap
+
+# A floor and the random streams of the game's systems on it, see GameWorld.get_rng
+FloorState = Tuple["GameMap", Dict[str, "random.Random"]]
+
+
+class _FloorPickler(pickle.Pickler):
+    """Pickler leaving the engine and the player out of a floor, they're put back when it's loaded"""
+
+    def __init__(self, file: BinaryIO, engine: Engine):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.engine = engine
+
+    def persistent_id(self, obj: Any) -> Optional[str]:
+        """Return a reference for the engine and the player, or None for any other object"""
+        if obj is self.engine:
+            return "engine"
+        if obj is self.engine.player:
+            return "player"
+        return None
+
+
+class _FloorUnpickler(pickle.Unpickler):
+    """Unpickler putting back the objects left out by _FloorPickler"""
+
+    def __init__(self, file: BinaryIO, engine: Engine):
+        super().__init__(file)
+        self.engine = engine
+
+    def persistent_load(self, pid: str) -> Any:
+        """Return the object of a reference"""
+        if pid == "engine":
+            return self.engine
+        if pid == "player":
+            return self.engine.player
+        raise pickle.UnpicklingError(f"Unknown reference in floor: {pid!r}")
+
+
+class FloorStore:
+    """The floors of the dungeon the player has been on and left, by floor number.
+
+    The last `resident_floors` floors left stay in memory, older ones are paged out:
+    pickled, compressed and written to a temporary directory, and read back when the
+    player returns to them.  So the memory used doesn't grow with the number of floors.
+    Paged out floors are saved with the game as savefile.FileBlocks, so a save doesn't read
+    them back into memory, and journaled saves only write each page once.
+    """
+
+    def __init__(self, engine: Engine, resident_floors: int = 2):
+        self.engine = engine
+        self.resident_floors = resident_floors
+        self._resident: OrderedDict[int, FloorState] = collections.OrderedDict()  # Oldest first
+        # File and hash of the page of each paged out floor.  A page is never written over,
+        # so a snapshot being saved can still read the pages it was taken with.
+        self._pages: Dict[int, Tuple[str, bytes]] = {}
+        self._page_count = 0  # Pages written, to name them
+        self._directory: Optional[str] = None
+        self._finalizer: Optional[weakref.finalize] = None
+
+    def __getstate__(self) -> dict:
+        """Save the paged out floors with the store, instead of the directory they're in"""
+        state = self.__dict__.copy()
+        del state["_pages"], state["_page_count"], state["_directory"], state["_finalizer"]
+        state["pages"] = {
+            floor: savefile.FileBlock(path, key) for floor, (path, key) in sorted(self._pages.items())
+        }
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Page out the saved floors again"""
+        pages: Dict[int, Any] = state.pop("pages")  # Any buffer of the pages
+        self.__dict__.update(state)
+        self._pages = {}
+        self._page_count = 0
+        self._directory = None
+        self._finalizer = None
+        for floor, page in pages.items():
+            self._write_page(floor, page)
+
+    def __contains__(self, floor: int) -> bool:
+        return floor in self._resident or floor in self._pages
+
+    def __len__(self) -> int:
+        return len(self._resident) + len(self._pages)
+
+    @property
+    def paged_floors(self) -> Set[int]:
+        """Numbers of the floors which are paged out"""
+        return set(self._pages)
+
+    def put(self, floor: int, game_map: GameMap, rngs: Dict[str, random.Random]) -> None:
+        """Keep a floor the player is leaving, paging out the least recently left ones if needed."""
+        self.discard(floor)
+        self._resident[floor] = game_map, rngs
+        while len(self._resident) > self.resident_floors:
+            oldest, (oldest_map, oldest_rngs) = self._resident.popitem(last=False)
+            self._page_out(oldest, oldest_map, oldest_rngs)
+
+    def take(self, floor: int) -> Optional[FloorState]:
+        """Remove a floor from the store and return it with its random streams, or None if it isn't here."""
+        if floor in self._resident:
+            return self._resident.pop(floor)
+        if floor in self._pages:
+            return self._page_in(floor)
+        return None
+
+    def discard(self, floor: int) -> None:
+        """Forget a floor, if it's in the store."""
+        self._resident.pop(floor, None)
+        if floor in self._pages:
+            path, _ = self._pages.pop(floor)
+            try:
+                os.remove(path)
+            except PermissionError:
+                pass  # Still open for a save being written, on Windows.  It goes with the directory.
+
+    def _get_directory(self) -> str:
+        """Return the directory of the pages, making it if needed."""
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix="floors-")
+            # The pages are removed once the store is gone, or when the game exits.
+            self._finalizer = weakref.finalize(self, shutil.rmtree, self._directory, True)
+        return self._directory
+
+    def _read_page(self, floor: int) -> bytes:
+        """Return the page of a paged out floor"""
+        with open(self._pages[floor][0], "rb") as f:
+            return f.read()
+
+    def _write_page(self, floor: int, page: Any) -> None:
+        """Write the page of a floor to a new file and remember it's paged out."""
+        self._page_count += 1
+        path = os.path.join(self._get_directory(), f"floor{floor}-{self._page_count}.page")
+        with open(path, "wb") as f:
+            f.write(page)
+        self._pages[floor] = path, hashlib.blake2b(page, digest_size=16).digest()
+
+    def _page_out(self, floor: int, game_map: GameMap, rngs: Dict[str, random.Random]) -> None:
+        """Write a floor to its page."""
+        pickled = io.BytesIO()
+        _FloorPickler(pickled, self.engine).dump((game_map, rngs))
+        self._write_page(floor, zlib.compress(pickled.getvalue(), 6))
+
+    def _page_in(self, floor: int) -> FloorState:
+        """Read a floor back from its page, and remove the page."""
+        page = self._read_page(floor)
+        self.discard(floor)
+        game_map, rngs = _FloorUnpickler(io.BytesIO(zlib.decompress(page)), self.engine).load()
+        return game_map, rngs
@@ -1,19 +1,31 @@
 """File defining a gamemap's characteristics"""
 from __future__ import annotations
 
-from typing import Iterable, Iterator, Optional, TYPE_CHECKING
+import concurrent.futures
+import random
+import traceback
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, TYPE_CHECKING
 
 import numpy as np  # type: ignore
 from tcod.console import Console
 
 from entity import Actor, Item
+from entity_store import EntityStore
+from floor_store import FloorStore
+from render_order import RenderOrder
 import tile_types
+from turn_scheduler import TurnScheduler
 
 if TYPE_CHECKING:
     from engine import Engine
     from entity import Entity
 
 
+def floor_rng(seed: int, floor: int, system: str) -> random.Random:
+    """Return a new random stream for a system of the game on a floor, derived from a world's seed."""
+    return random.Random(f"{seed}:{floor}:{system}")
+
+
 class GameMap:
     """Basic gamemap class"""
     def __init__(
@@ -21,8 +33,20 @@ class GameMap:
     ):
         self.engine = engine
         self.width, self.height = width, height
-        self.entities = set(entities)
-        self.tiles = np.full((width, height), fill_value=tile_types.wall, order="F")
+        self.entities: Set[Entity] = set()
+        # Per-tile index of the entities in `self.entities`, so location lookups
+        # don't have to scan every entity on the map.
+        self._entities_by_location: Dict[Tuple[int, int], List[Entity]] = {}
+        self._entity_locations: Dict[Entity, Tuple[int, int]] = {}
+        self.scheduler = TurnScheduler()  # Every living actor other than the player
+        self.store = EntityStore()  # Columns of the entities' state, for vectorized queries
+
+        # Increase this after changing the tiles once the map is in play, so the FOV gets recomputed
+        self.transparency_version = 0
+        self._pathing_cost: Optional[np.ndarray] = None
+        self.tiles = np.full(
+            (width, height), fill_value=tile_types.wall, dtype=tile_types.tile_id_dt, order="F"
+        )
 
         self.visible = np.full(
             (width, height), fill_value=False, order="F"
@@ -30,7 +54,84 @@ class GameMap:
         self.explored = np.full(
             (width, height), fill_value=False, order="F"
         )  # Tiles the player has seen before
+        self.blockers = np.zeros(
+            (width, height), dtype=np.int16, order="F"
+        )  # Number of movement blocking entities on each tile
         self.downstairs_location = (0, 0)
+        self.upstairs_location: Optional[Tuple[int, int]] = None  # None on the first floor
+
+        # Light/dark composite of the tiles, only updated where it went out of date
+        self._graphics: Optional[np.ndarray] = None
+        self._graphics_version = self.transparency_version
+        self._dirty_window: Optional[Tuple[slice, slice]] = None  # Bounding box of the out of date area
+
+        for entity in entities:
+            self.add_entity(entity)
+
+    def __getstate__(self) -> dict:
+        """Don't save the graphics buffer or the pathing costs, they're rebuilt when next needed.
+
+        The names of the tiles are saved, so a game with other tiles can tell which ids are which.
+        """
+        state = self.__dict__.copy()
+        state["_graphics"] = None
+        state["_pathing_cost"] = None
+        state["tile_names"] = tile_types.names
+        state["_dirty_window"] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Restore a map, mapping its tile ids to the current tiles.
+
+        Maps saved before floors had up stairs have none, and their tiles weren't ids yet.
+        """
+        if "store" not in state:
+            self._set_legacy_state(state)
+            return
+        state.setdefault("upstairs_location", None)
+        state.pop("_render_buckets", None)  # Saved before the store gave the drawing order
+        if "tiles" in state:
+            state["_tiles"] = state.pop("tiles")
+        if state["_tiles"].dtype == tile_types.tile_dt:
+            state["_tiles"] = tile_types.to_ids(state["_tiles"])
+        # Saves from before the names were saved used the tiles in their current order.
+        tile_names = state.pop("tile_names", tile_types.names)
+        state["_tiles"] = tile_types.remap_ids(state["_tiles"], tile_names)
+        state["_pathing_cost"] = None
+        self.__dict__.update(state)
+
+    def _set_legacy_state(self, state: dict) -> None:
+        """Restore a map saved before maps indexed their entities.
+
+        Its entities may not be loaded yet, so they're only added by add_legacy_entities
+        once the whole save is.
+        """
+        self.__init__(state["engine"], state["width"], state["height"])
+        self.tiles = tile_types.to_ids(state["tiles"])
+        self.visible[...] = state["visible"]
+        self.explored[...] = state["explored"]
+        self.downstairs_location = state["downstairs_location"]
+        self._legacy_entities = list(state["entities"])
+
+    def add_legacy_entities(self) -> None:
+        """Add the entities of a map restored by _set_legacy_state, once they are loaded."""
+        for entity in self.__dict__.pop("_legacy_entities", ()):
+            self.add_entity(entity)
+
+    @property
+    def tiles(self) -> np.ndarray:
+        """Id of the kind of each tile, see tile_types.tiles
+
+        Assign a new array to change the tiles once the map is in play,
+        so what's derived from them gets updated.
+        """
+        return self._tiles
+
+    @tiles.setter
+    def tiles(self, tiles: np.ndarray) -> None:
+        self._tiles = tiles
+        self._pathing_cost = None
+        self.transparency_version += 1
 
     @property
     def gamemap(self) -> GameMap:
@@ -40,36 +141,138 @@ class GameMap:
     @property
     def actors(self) -> Iterator[Actor]:
         """Iterate over this maps living actors."""
-        yield from (
-            entity
-            for entity in self.entities
-            if isinstance(entity, Actor) and entity.is_alive
-        )
+        yield from self.store.living_actors()
 
     @property
     def items(self) -> Iterator[Item]:
         """Items in the gamemap"""
         yield from (entity for entity in self.entities if isinstance(entity, Item))
 
+    def add_entity(self, entity: Entity) -> None:
+        """Add an entity to this map at its current location.
+
+        If the entity is already on this map it is re-indexed instead.
+        """
+        if entity in self.entities:
+            self._unindex_entity(entity)
+            self.store.update_location(entity)
+        else:
+            self.store.add(entity)
+            if (
+                    isinstance(entity, Actor)
+                    and entity.is_alive
+                    and entity is not self.engine.player
+            ):
+                self.scheduler.add(entity)
+        self.entities.add(entity)
+        self._index_entity(entity)
+
+    def remove_entity(self, entity: Entity) -> None:
+        """Remove an entity from this map."""
+        self.entities.remove(entity)
+        self._unindex_entity(entity)
+        self.store.remove(entity)
+        if isinstance(entity, Actor):
+            self.scheduler.remove(entity)
+
+    def update_entity_location(self, entity: Entity) -> None:
+        """Re-index an entity of this map after its x and y have changed."""
+        self._unindex_entity(entity)
+        self._index_entity(entity)
+        self.store.update_location(entity)
+
+    def update_entity_blocking(self, entity: Entity, blocks_movement: bool) -> None:
+        """Update the blocking layers before an entity of this map changes its blocks_movement."""
+        if blocks_movement != entity.blocks_movement:
+            self._add_blocker(*self._entity_locations[entity], 1 if blocks_movement else -1)
+
+    def update_entity_render_order(self, entity: Entity, render_order: RenderOrder) -> None:
+        """Update the store before an entity of this map changes its render_order."""
+        self.store.set_render_order(entity, render_order.value)
+
+    def _index_entity(self, entity: Entity) -> None:
+        """Record the entity under its current location."""
+        location = entity.x, entity.y
+        self._entity_locations[entity] = location
+        self._entities_by_location.setdefault(location, []).append(entity)
+        if entity.blocks_movement:
+            self._add_blocker(*location, 1)
+
+    def _unindex_entity(self, entity: Entity) -> None:
+        """Forget the location the entity was last indexed under."""
+        location = self._entity_locations.pop(entity)
+        entities_here = self._entities_by_location[location]
+        entities_here.remove(entity)
+        if not entities_here:
+            del self._entities_by_location[location]
+        if entity.blocks_movement:
+            self._add_blocker(*location, -1)
+
+    def _add_blocker(self, x: int, y: int, amount: int) -> None:
+        """Add or remove blocking entities from a tile and keep the pathing costs in sync."""
+        self.blockers[x, y] += amount
+        if self._pathing_cost is not None and tile_types.lookup(self.tiles[x, y], "walkable"):
+            self._pathing_cost[x, y] = 11 if self.blockers[x, y] else 1
+
+    @property
+    def pathing_cost(self) -> np.ndarray:
+        """The cost of walking over each tile, for use by pathfinders.
+
+        Walls cost 0 (impassable), floors cost 1 and floors with a blocking entity cost 11.
+        A lower blocker cost means more enemies will crowd behind each other in
+        hallways.  A higher cost means enemies will take longer paths in
+        order to surround the player.
+
+        This array is built from the tiles the first time it is needed, then kept
+        up to date as blocking entities come and go. Don't modify it.
+        """
+        if self._pathing_cost is None:
+            walkable = tile_types.lookup(self.tiles, "walkable")
+            self._pathing_cost = np.array(walkable, dtype=np.int8)
+            self._pathing_cost[walkable & (self.blockers > 0)] += 10
+        return self._pathing_cost
+
+    def wake_actors_near(
+            self, x: int, y: int, radius: int, mask: Optional[np.ndarray] = None
+    ) -> None:
+        """Wake up the dormant actors within `radius` tiles of the given location.
+
+        If `mask` is given then only actors on tiles where it is True are woken.
+        """
+        if not self.scheduler.dormant:
+            return
+        x1, x2 = max(0, x - radius), min(self.width, x + radius + 1)
+        y1, y2 = max(0, y - radius), min(self.height, y + radius + 1)
+
+        # Living actors block movement, so only the occupied tiles need to be checked.
+        occupied = self.blockers[x1:x2, y1:y2] > 0
+        if mask is not None:
+            occupied &= mask[x1:x2, y1:y2]
+
+        for i, j in zip(*np.nonzero(occupied)):
+            for entity in self.get_entities_at_location(x1 + int(i), y1 + int(j)):
+                if isinstance(entity, Actor):
+                    self.scheduler.wake(entity)
+
+    def get_entities_at_location(self, x: int, y: int) -> List[Entity]:
+        """Return the entities standing on the given tile."""
+        return self._entities_by_location.get((x, y), [])
+
     def get_blocking_entity_at_location(
             self, location_x: int, location_y: int,
     ) -> Optional[Entity]:
         """Check if an entity is blocking movement or not, and returns it if applicable"""
-        for entity in self.entities:
-            if (
-                    entity.blocks_movement
-                    and entity.x == location_x
-                    and entity.y == location_y
-            ):
+        for entity in self.get_entities_at_location(location_x, location_y):
+            if entity.blocks_movement:
                 return entity
 
         return None
 
     def get_actor_at_location(self, x: int, y: int) -> Optional[Actor]:
         """Gives the location of an actor if applicable"""
-        for actor in self.actors:
-            if actor.x == x and actor.y == y:
-                return actor
+        for entity in self.get_entities_at_location(x, y):
+            if isinstance(entity, Actor) and entity.is_alive:
+                return entity
 
         return None
 
@@ -77,34 +280,66 @@ class GameMap:
         """Return True if x and y are inside of the bounds of this map."""
         return 0 <= x < self.width and 0 <= y < self.height
 
-    def render(self, console: Console) -> None:
+    def invalidate_graphics(self, window: Optional[Tuple[slice, slice]] = None) -> None:
+        """Mark an area of the map as needing to be redrawn, or the whole map if no `window` is given.
+
+        Call this after changing `visible` or `explored`.
         """
-        Renders the map.
+        if window is None:
+            self._graphics = None
+        elif self._graphics is not None:  # Otherwise the whole composite is rebuilt anyway.
+            # Only the bounding box of the areas is kept, so it doesn't grow when the map isn't rendered.
+            x1, x2, _ = window[0].indices(self.width)
+            y1, y2, _ = window[1].indices(self.height)
+            if self._dirty_window is not None:
+                x1, x2 = min(x1, self._dirty_window[0].start), max(x2, self._dirty_window[0].stop)
+                y1, y2 = min(y1, self._dirty_window[1].start), max(y2, self._dirty_window[1].stop)
+            self._dirty_window = slice(x1, x2), slice(y1, y2)
+
+    def _update_graphics(self) -> np.ndarray:
+        """Bring the light/dark composite of the tiles up to date and return it.
 
         If a tile is in the "visible" array, then draw it with the "light" colors.
         If it isn't, but it's in the "explored" array, then draw it with the "dark" colors.
         Otherwise, the default is "SHROUD".
         """
-        console.tiles_rgb[0: self.width, 0: self.height] = np.select(
-            condlist=[self.visible, self.explored],
-            choicelist=[self.tiles["light"], self.tiles["dark"]],
-            default=tile_types.SHROUD,
-        )
+        if self._graphics is None or self._graphics_version != self.transparency_version:
+            self._graphics = np.empty(
+                (self.width, self.height), dtype=tile_types.graphic_dt, order="F"
+            )
+            self._graphics_version = self.transparency_version
+            self._dirty_window = slice(None), slice(None)
 
-        entities_sorted_for_rendering = sorted(
-            self.entities, key=lambda x: x.render_order.value
-        )
+        window = self._dirty_window
+        if window is not None:
+            tile_ids = self.tiles[window]
+            self._graphics[window] = np.select(
+                condlist=[self.visible[window], self.explored[window]],
+                choicelist=[tile_types.lookup(tile_ids, "light"), tile_types.lookup(tile_ids, "dark")],
+                default=tile_types.SHROUD,
+            )
+            self._dirty_window = None
+        return self._graphics
+
+    def render(self, console: Console) -> None:
+        """
+        Renders the map.
+
+        The tiles are drawn from a cached composite which is only updated where
+        the visible or explored state changed since the last frame.
+        The visible entities and their drawing order are found from the columns of the store.
+        """
+        console.tiles_rgb[0: self.width, 0: self.height] = self._update_graphics()
 
-        for entity in entities_sorted_for_rendering:
-            if self.visible[entity.x, entity.y]:
-                console.print(
-                    x=entity.x, y=entity.y, string=entity.char, fg=entity.color
-                )
+        for entity in self.store.visible_in_render_order(self.visible):
+            console.print(
+                x=entity.x, y=entity.y, string=entity.char, fg=entity.color
+            )
 
 
 class GameWorld:
-    """Holds the settings for the GameMap,
-    and generates new maps when moving down the stairs"""
+    """Holds the settings for the GameMap, generates new maps when moving down the stairs,
+    and keeps the floors the player left in `floors`"""
 
     def __init__(
             self,
@@ -116,6 +351,10 @@ class GameWorld:
             room_min_size: int,
             room_max_size: int,
             current_floor: int = 0,
+            activity_radius: int = 20,
+            seed: Optional[int] = None,
+            pregenerate_floors: bool = False,
+            resident_floors: int = 2,
     ):
         self.engine = engine
         self.map_width = map_width
@@ -124,17 +363,127 @@ class GameWorld:
         self.room_min_size = room_min_size
         self.room_max_size = room_max_size
         self.current_floor = current_floor
+        self.deepest_floor = current_floor  # Deepest floor generated so far
+        # Floors the player left, the last `resident_floors` of them are kept in memory
+        self.floors = FloorStore(engine, resident_floors)
+        # Enemies further than this from the player, or on unexplored tiles, go dormant
+        self.activity_radius = activity_radius
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed  # Every random stream of this world is derived from it
+        self._rngs: Dict[str, random.Random] = {}  # Streams of the current floor
+        # If True then the next floor is planned in a background process while this one is played
+        self.pregenerate_floors = pregenerate_floors
+        self._next_floor_plan: Optional[concurrent.futures.Future] = None
 
-    def generate_floor(self) -> None:
-        """Creates a floor of the dungeon"""
-        from procgen import generate_dungeon
-        self.current_floor += 1
+    def __getstate__(self) -> dict:
+        """Don't save the plan being made for the next floor, it will be made again when needed"""
+        state = self.__dict__.copy()
+        state["_next_floor_plan"] = None
+        return state
 
-        self.engine.game_map = generate_dungeon(
+    def __setstate__(self, state: dict) -> None:
+        """Give worlds from older saves the settings added since.
+
+        Worlds saved before floors were kept only have their current floor,
+        and those saved before worlds had a seed get a random one.
+        """
+        if "floors" not in state:
+            state["deepest_floor"] = state["current_floor"]
+            state["floors"] = FloorStore(state["engine"])
+        if "seed" not in state:
+            state["seed"] = random.getrandbits(64)
+            state["_rngs"] = {}
+        state.setdefault("activity_radius", 20)
+        state.setdefault("pregenerate_floors", False)
+        state.setdefault("_next_floor_plan", None)
+        self.__dict__.update(state)
+
+    def get_rng(self, system: str) -> random.Random:
+        """Return the random stream used by a system of the game on the current floor.
+
+        Every floor and system has its own independent stream derived from the world's seed,
+        so the same seed always gives the same floors.  The streams are saved with the game.
+        """
+        rng = self._rngs.get(system)
+        if rng is None:
+            rng = self._rngs[system] = floor_rng(self.seed, self.current_floor, system)
+        return rng
+
+    def get_floor_settings(self, floor: int) -> Dict[str, int]:
+        """Return the arguments given to procgen.plan_dungeon for the given floor"""
+        return dict(
+            seed=self.seed,
+            floor=floor,
             max_rooms=self.max_rooms,
             room_min_size=self.room_min_size,
             room_max_size=self.room_max_size,
             map_width=self.map_width,
             map_height=self.map_height,
-            engine=self.engine,
         )
+
+    def descend(self) -> None:
+        """Move the player down to the next floor, which is generated if it's new"""
+        self.change_floor(self.current_floor + 1)
+
+    def ascend(self) -> None:
+        """Move the player back up to the previous floor"""
+        self.change_floor(self.current_floor - 1)
+
+    def change_floor(self, floor: int) -> None:
+        """Move the player to a floor of the dungeon.
+
+        A floor visited before is taken back from `floors`, as the player left it,
+        and the player arrives on the stairs leading to the floor they came from.
+        A new floor is generated, and the player arrives where its plan says.
+        The floor being left is put in `floors`.
+        """
+        if floor < 1:
+            raise ValueError(f"There is no floor {floor}")
+        previous_floor = self.current_floor
+        previous_map: Optional[GameMap] = getattr(self.engine, "game_map", None)
+        previous_rngs = self._rngs
+
+        kept_floor = self.floors.take(floor)
+        self.current_floor = floor
+        if kept_floor is None:
+            self._rngs = {}  # Start the streams of the new floor
+            self.engine.game_map = self._generate_floor(floor)
+        else:
+            game_map, self._rngs = kept_floor
+            self.engine.game_map = game_map
+            arrival = game_map.upstairs_location if floor > previous_floor else game_map.downstairs_location
+            if arrival is None:  # Only the first floor has no up stairs, it can't be arrived at from below.
+                arrival = self.engine.player.x, self.engine.player.y
+            self.engine.player.place(*arrival, game_map)
+
+        # The player was moved off the previous map, so it can be stored without them.
+        if previous_map is not None and previous_floor != floor:
+            self.floors.put(previous_floor, previous_map, previous_rngs)
+
+    def _generate_floor(self, floor: int) -> GameMap:
+        """Creates a floor of the dungeon, and moves the player onto it
+
+        The floor's plan is taken from the background process if it was made
+        ahead of time, otherwise it is made now.
+        """
+        import procgen
+
+        plan = None
+        if self._next_floor_plan is not None and floor == self.deepest_floor + 1:
+            try:
+                plan = self._next_floor_plan.result()
+            except Exception:  # The background process failed, make the plan here instead.
+                traceback.print_exc()
+            self._next_floor_plan = None
+        if plan is None:
+            plan = procgen.plan_dungeon(**self.get_floor_settings(floor))
+
+        game_map = procgen.build_dungeon(plan, self.engine)
+        self.deepest_floor = max(self.deepest_floor, floor)
+
+        if self.pregenerate_floors and floor == self.deepest_floor:
+            self._next_floor_plan = procgen.submit_plan_dungeon(
+                **self.get_floor_settings(floor + 1)
+            )
+        return game_map
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Run game sessions without a window, a tileset or any image
+
+Useful to run the simulation in CI, on servers or in worker processes.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from typing import Optional, TYPE_CHECKING
+
+from actions import BumpAction, WaitAction
+import input_handlers
+import setup_game
+
+if TYPE_CHECKING:
+    from actions import Action
+    from engine import Engine
+    from entity import Actor
+
+
+class HeadlessSession:
+    """A game session driven by code instead of a window and a keyboard"""
+
+    def __init__(self, engine: Optional[Engine] = None):
+        if engine is None:
+            engine = setup_game.new_game()
+        self.engine = engine
+        # Actions are handled exactly like the windowed game does.
+        self._handler = input_handlers.EventHandler(engine)
+        self.turns = 0
+
+    @property
+    def player(self) -> Actor:
+        """The actor controlled by this session"""
+        return self.engine.player
+
+    @property
+    def is_over(self) -> bool:
+        """True once the player is dead"""
+        return not self.engine.player.is_alive
+
+    def perform(self, action: Action) -> bool:
+        """Perform an action for the player, then let the enemies take their turn.
+
+        Returns True if the action was possible and a turn passed, otherwise
+        the reason it wasn't is added to the message log.
+        """
+        if self._handler.handle_action(action):
+            self.turns += 1
+            return True
+        return False
+
+
+def main() -> None:
+    """Play a session where the player wanders at random, and print how it went"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=1000, help="maximum number of turns to play")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the game world")
+    args = parser.parse_args()
+
+    session = HeadlessSession(setup_game.new_game(seed=args.seed))
+    directions = list(input_handlers.MOVE_KEYS.values())
+    while session.turns < args.turns and not session.is_over:
+        dx, dy = random.choice(directions)
+        if not session.perform(BumpAction(session.player, dx, dy)):
+            session.perform(WaitAction(session.player))
+
+    print(
+        f"Turns: {session.turns}, floor: {session.engine.game_world.current_floor}, "
+        f"HP: {session.player.fighter.hp}/{session.player.fighter.max_hp}"
+    )
+
+
+if __name__ == "__main__":
+    main()
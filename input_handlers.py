@@ -1,8 +1,6 @@
 """Manages the player's input"""
 from __future__ import annotations
 
-import os
-
 from typing import Callable, Tuple, Optional, TYPE_CHECKING, Union
 import equipment_types
 import tcod
@@ -16,6 +14,7 @@ from actions import (
 )
 import color
 import exceptions
+import savefile
 
 if TYPE_CHECKING:
     from engine import Engine
@@ -72,6 +71,10 @@ MainGameEventHandler will become the active handler"""
 class BaseEventHandler(tcod.event.EventDispatch[ActionOrHandler]):
     """Base class for event handlers"""
 
+    needs_redraw = True
+    """Set when what this handler renders has changed, cleared by the main loop once it's drawn.
+    The main loop also sets it whenever it switches to another handler."""
+
     def handle_events(self, event: tcod.event.Event) -> BaseEventHandler:
         """Handle an event and return the next active event handler"""
         state = self.dispatch(event)
@@ -100,6 +103,8 @@ class EventHandler(BaseEventHandler):
         action_or_state = self.dispatch(event)
         if isinstance(action_or_state, BaseEventHandler):
             return action_or_state
+        if action_or_state is not None:
+            self.needs_redraw = True  # Either a turn passed or the reason it couldn't was logged.
         if self.handle_action(action_or_state):
             # A valid action was performed
             if not self.engine.player.is_alive:
@@ -127,11 +132,14 @@ class EventHandler(BaseEventHandler):
         self.engine.handle_enemy_turns()
 
         self.engine.update_fov()
+        self.engine.end_turn()
         return True
 
     def ev_mousemotion(self, event: tcod.event.MouseMotion) -> None:
         """Enables detection of the mouse's position on the screen"""
         if self.engine.game_map.in_bounds(event.tile.x, event.tile.y):
+            if self.engine.mouse_location != (event.tile.x, event.tile.y):
+                self.needs_redraw = True  # Only redraw when the hovered tile changes.
             self.engine.mouse_location = event.tile.x, event.tile.y
 
     def on_render(self, console: tcod.Console) -> None:
@@ -280,6 +288,7 @@ class LevelUpEventHandler(AskUserEventHandler):
                 player.level.increase_intelligence()
         else:
             self.engine.message_log.add_message("Invalid entry", color.invalid)
+            self.needs_redraw = True
 
             return None
 
@@ -355,6 +364,7 @@ class InventoryEventHandler(AskUserEventHandler):
                 selected_item = player.inventory.items[index]
             except IndexError:
                 self.engine.message_log.add_message("Invalid entry.", color.invalid)
+                self.needs_redraw = True
                 return None
             return self.on_item_selected(selected_item)
         return super().ev_keydown(event)
@@ -451,6 +461,7 @@ class EquipmentScreenEventHandler(AskUserEventHandler):
                 selected_item = player.inventory.items[index]
             except IndexError:
                 self.engine.message_log.add_message("Invalid entry.", color.invalid)
+                self.needs_redraw = True
                 return None
             return self.on_item_selected(selected_item)
         return super().ev_keydown(event)
@@ -492,6 +503,7 @@ class SelectIndexHandler(AskUserEventHandler):
             x = max(0, min(x, self.engine.game_map.width - 1))
             y = max(0, min(y, self.engine.game_map.height - 1))
             self.engine.mouse_location = x, y
+            self.needs_redraw = True
             return None
         elif key in CONFIRM_KEYS:
             return self.on_index_selected(*self.engine.mouse_location)
@@ -541,10 +553,10 @@ class MainGameEventHandler(EventHandler):
 
         player = self.engine.player
 
-        if key == tcod.event.K_PERIOD and modifier & (
+        if key in (tcod.event.K_PERIOD, tcod.event.K_COMMA) and modifier & (
                 tcod.event.KMOD_LSHIFT | tcod.event.KMOD_RSHIFT
         ):
-            return actions.TakeStairsAction(player)
+            return actions.TakeStairsAction(player)  # ">" or "<", whichever stairs are here
 
         if key in MOVE_KEYS:
             dx, dy = MOVE_KEYS[key]
@@ -614,8 +626,8 @@ class GameOverEventHandler(EventHandler):
 
     def on_quit(self) -> None:
         """Handle exiting out of a finished game"""
-        if os.path.exists("savegame.sav"):
-            os.remove("savegame.sav")  # Deletes the active save file
+        savefile.background_saver.wait()  # An autosave finishing later would bring the file back.
+        savefile.delete("savegame.sav")  # Deletes the active save file
         raise exceptions.QuitWithoutSaving()  # Avoid saving a finished game
 
     def ev_quit(self, event: tcod.event.Quit) -> None:
@@ -641,29 +653,38 @@ class HistoryViewer(EventHandler):
 
     def __init__(self, engine: Engine):
         super().__init__(engine)
-        self.log_length = len(engine.message_log.messages)
+        self.log_length = len(engine.message_log)
         self.cursor = self.log_length - 1
+        self._log_console: Optional[tcod.Console] = None  # Reused by every frame
+
+    def get_log_console(self, width: int, height: int) -> tcod.Console:
+        """Return the framed off-screen console of the history, with its inside cleared."""
+        log_console = self._log_console
+        if log_console is None or (log_console.width, log_console.height) != (width, height):
+            log_console = self._log_console = tcod.Console(width, height)
+
+            # Draw a frame with a custom banner title.
+            log_console.draw_frame(0, 0, log_console.width, log_console.height)
+            log_console.print_box(
+                0, 0, log_console.width, 1, "┤Message history├", alignment=tcod.CENTER
+            )
+        else:
+            log_console.draw_rect(1, 1, width - 2, height - 2, ch=ord(" "), fg=color.white, bg=color.black)
+        return log_console
 
     def on_render(self, console: tcod.Console) -> None:
         """Renders the history viewer"""
         super().on_render(console)  # Draw the main state as the background.
 
-        log_console = tcod.Console(console.width - 6, console.height - 6)
-
-        # Draw a frame with a custom banner title.
-        log_console.draw_frame(0, 0, log_console.width, log_console.height)
-        log_console.print_box(
-            0, 0, log_console.width, 1, "┤Message history├", alignment=tcod.CENTER
-        )
+        log_console = self.get_log_console(console.width - 6, console.height - 6)
 
         # Render the message log using the cursor parameter.
-        self.engine.message_log.render_messages(
-            log_console,
-            1,
-            1,
-            log_console.width - 2,
-            log_console.height - 2,
-            self.engine.message_log.messages[: self.cursor + 1],
+        # Only the messages which fit on the screen are fetched.
+        message_log = self.engine.message_log
+        width, height = log_console.width - 2, log_console.height - 2
+        first = message_log.get_first_message(self.cursor + 1, width, height)
+        message_log.render_messages(
+            log_console, 1, 1, width, height, message_log.get_messages(first, self.cursor + 1),
         )
         log_console.blit(console, 3, 3)
 
@@ -687,6 +708,7 @@ class HistoryViewer(EventHandler):
             self.cursor = self.log_length - 1  # Move directly to the last message.
         else:  # Any other key moves back to the main game state.
             return MainGameEventHandler(self.engine)
+        self.needs_redraw = True
         return None
 
 
@@ -9,14 +9,20 @@ import color
 import exceptions
 import input_handlers
 
+import savefile
 import setup_game
 
 
 def save_game(handler: input_handlers.BaseEventHandler, filename: str) -> None:
-    """If the current event handler has an active Engine then save it"""
+    """If the current event handler has an active Engine then save it
+
+    This is called once the window is closed, and the game only exits once the file is written.
+    """
     if isinstance(handler, input_handlers.EventHandler):
-        handler.engine.save_as(filename)
+        handler.engine.save_in_background(filename).result()  # Saves are written in order.
         print("Game saved!")
+    else:
+        savefile.background_saver.wait()  # Don't cut off an autosave in progress.
 
 
 def main() -> None:
@@ -30,24 +36,43 @@ def main() -> None:
 
     handler: input_handlers.BaseEventHandler = setup_game.MainMenu()
 
-    with tcod.context.new_terminal(
-            screen_width,
-            screen_height,
-            tileset=tileset,
-            title="Roguelike Tutorial",
-            vsync=True,
-    ) as context:
-        root_console = tcod.Console(screen_width, screen_height, order="F")
-        try:
+    # The window is closed before saving on exit, so it doesn't hang while the save is written.
+    try:
+        with tcod.context.new_terminal(
+                screen_width,
+                screen_height,
+                tileset=tileset,
+                title="Roguelike Tutorial",
+                vsync=True,
+        ) as context:
+            root_console = tcod.Console(screen_width, screen_height, order="F")
+            shown_save_status = savefile.background_saver.status
             while True:
-                root_console.clear()
-                handler.on_render(console=root_console)
-                context.present(root_console)
+                save_status = savefile.background_saver.status
+                if save_status != shown_save_status:
+                    handler.needs_redraw = True  # The save indicator changed.
+
+                # Only draw a new frame when something on screen changed.
+                if handler.needs_redraw:
+                    root_console.clear()
+                    handler.on_render(console=root_console)
+                    context.present(root_console)
+                    handler.needs_redraw = False
+                    shown_save_status = save_status
 
+                # While a save is being written, wake up to take its indicator down once it's done.
+                timeout = 0.1 if save_status == "saving" else None
                 try:
-                    for event in tcod.event.wait():
+                    # All the queued events are handled before the next frame is drawn.
+                    for event in tcod.event.wait(timeout):
                         context.convert_event(event)
-                        handler = handler.handle_events(event)
+                        if isinstance(event, tcod.event.WindowEvent):
+                            handler.needs_redraw = True  # The window may need repainting.
+                        new_handler = handler.handle_events(event)
+                        if new_handler is not handler:
+                            # A handler returned to, like a popup's parent, was drawn under something else.
+                            new_handler.needs_redraw = True
+                            handler = new_handler
                 except Exception:  # Handle exceptions in game
                     traceback.print_exc()  # Print error to stderr
                     # Then print the error to the message log
@@ -55,14 +80,15 @@ def main() -> None:
                         handler.engine.message_log.add_message(
                             traceback.format_exc(), color.error
                         )
-        except exceptions.QuitWithoutSaving:
-            raise
-        except SystemExit:  # Save and quit
-            save_game(handler, "savegame.sav")
-            raise
-        except BaseException:  # Save on any other unexpected exception
-            save_game(handler, "savegame.sav")
-            raise
+                    handler.needs_redraw = True
+    except exceptions.QuitWithoutSaving:
+        raise
+    except SystemExit:  # Save and quit
+        save_game(handler, "savegame.sav")
+        raise
+    except BaseException:  # Save on any other unexpected exception
+        save_game(handler, "savegame.sav")
+        raise
 
 
 if __name__ == "__main__":
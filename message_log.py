@@ -1,18 +1,37 @@
 """File controlling the message log"""
-from typing import Iterable, List, Reversible, Tuple
+from array import array
+import bisect
+import collections
+import itertools
+import json
+from typing import Any, BinaryIO, Deque, Dict, Iterable, List, Optional, Reversible, Tuple
 import textwrap
 
 import tcod
 
 import color
+from pickling import restore_slots
 
 
 class Message:
     """Base class of a message in the log"""
+
+    __slots__ = ("plain_text", "fg", "count", "_lines")
+
     def __init__(self, text: str, fg: Tuple[int, int, int]):
         self.plain_text = text
         self.fg = fg
         self.count = 1
+        self._lines: Optional[Tuple[int, int, List[str]]] = None  # Width, count and wrapped lines
+
+    def __getstate__(self) -> tuple:
+        """Don't save the wrapped lines, they are wrapped again when needed"""
+        return None, {"plain_text": self.plain_text, "fg": self.fg, "count": self.count}
+
+    def __setstate__(self, state: Any) -> None:
+        """Restore a message saved with __getstate__, or before messages had __slots__"""
+        restore_slots(self, state)
+        self._lines = None
 
     @property
     def full_text(self) -> str:
@@ -21,11 +40,52 @@ class Message:
             return f"{self.plain_text} (x{self.count})"
         return self.plain_text
 
+    def get_lines(self, width: int) -> List[str]:
+        """Return the full text of this message wrapped to `width`.
+
+        The lines are cached until the width or the count changes.
+        """
+        if self._lines is None or self._lines[:2] != (width, self.count):
+            self._lines = width, self.count, list(MessageLog.wrap(self.full_text, width))
+        return self._lines[2]
+
 
 class MessageLog:
-    """Base class of the log containing the messages"""
-    def __init__(self) -> None:
-        self.messages: List[Message] = []
+    """Base class of the log containing the messages
+
+    Only the last `capacity` messages are kept in memory.  If `history_path` is given
+    then older messages are appended to that file instead of being forgotten,
+    and read back from it when needed.
+    """
+    def __init__(self, capacity: int = 1000, history_path: Optional[str] = None) -> None:
+        self.messages: Deque[Message] = collections.deque(maxlen=capacity)
+        self.history_path = history_path
+        self.spilled = 0  # Number of messages moved from `messages` to the history file
+        self._history_file: Optional[BinaryIO] = None
+        self._history_offsets: Optional[array] = None  # Where each spilled message starts in the file
+        # For each width messages were laid out at, the running total of lines at the end of
+        # each message in `messages`.  Only differences between totals are meaningful.
+        self._line_ends: Dict[int, Deque[int]] = {}
+
+    def __getstate__(self) -> dict:
+        """Don't save the open history file, it is opened again when needed"""
+        state = self.__dict__.copy()
+        state["_history_file"] = None
+        state["_history_offsets"] = None
+        state["_line_ends"] = {}
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Restore a log, including one saved when logs kept every message in a list"""
+        if "spilled" not in state:
+            log = MessageLog()
+            log.messages.extend(state["messages"])
+            state = log.__dict__
+        self.__dict__.update(state)
+
+    def __len__(self) -> int:
+        """Number of messages in the whole history"""
+        return self.spilled + len(self.messages)
 
     def add_message(
         self, text: str, fg: Tuple[int, int, int] = color.white, *, stack: bool = True,
@@ -38,9 +98,100 @@ class MessageLog:
         of the same text.
         """
         if stack and self.messages and text == self.messages[-1].plain_text:
-            self.messages[-1].count += 1
+            last_message = self.messages[-1]
+            old_lines = {width: len(last_message.get_lines(width)) for width in self._line_ends}
+            last_message.count += 1
+            for width, line_ends in self._line_ends.items():
+                line_ends[-1] += len(last_message.get_lines(width)) - old_lines[width]
         else:
-            self.messages.append(Message(text, fg))
+            if len(self.messages) == self.messages.maxlen:
+                if self.history_path is not None:
+                    self._spill(self.messages[0])  # About to be pushed out of memory.
+                for line_ends in self._line_ends.values():
+                    line_ends.popleft()
+            message = Message(text, fg)
+            self.messages.append(message)
+            for width, line_ends in self._line_ends.items():
+                line_ends.append((line_ends[-1] if line_ends else 0) + len(message.get_lines(width)))
+
+    def _get_line_ends(self, width: int) -> Deque[int]:
+        """Return the running total of lines of the messages in memory at the given width."""
+        line_ends = self._line_ends.get(width)
+        if line_ends is None:
+            total_lines = itertools.accumulate(len(message.get_lines(width)) for message in self.messages)
+            line_ends = self._line_ends[width] = collections.deque(total_lines)
+        return line_ends
+
+    def get_first_message(self, stop: int, width: int, height: int) -> int:
+        """Return the index of the oldest message needed to fill `height` lines of `width`
+        with the messages of the history before `stop`.
+
+        Messages in memory are counted through the line index.  For older ones it's
+        assumed each takes at least one line.
+        """
+        memory_stop = stop - self.spilled
+        if memory_stop <= 0:
+            return max(0, stop - height)
+        line_ends = self._get_line_ends(width)
+        # Every message ending at or before this line total is scrolled out of view.
+        hidden_lines = line_ends[memory_stop - 1] - height
+        first = bisect.bisect_right(line_ends, hidden_lines, 0, memory_stop)
+        if first == 0:  # Every message in memory is needed, and maybe older ones too.
+            base = line_ends[0] - len(self.messages[0].get_lines(width))
+            lines_missing = max(0, height - (line_ends[memory_stop - 1] - base))
+            return max(0, self.spilled - lines_missing)
+        return self.spilled + first
+
+    def _open_history(self) -> BinaryIO:
+        """Open the history file, and index the messages this log spilled into it.
+
+        Anything written after them, by a later session which wasn't saved, is cut off.
+        """
+        if self._history_file is None:
+            assert self.history_path is not None
+            history_file = open(self.history_path, "a+b")
+            history_file.seek(0)
+            offsets = array("q")
+            for _ in range(self.spilled):
+                offset = history_file.tell()
+                if not history_file.readline():
+                    break  # The file lost some history, keep what's left.
+                offsets.append(offset)
+            self.spilled = len(offsets)
+            history_file.truncate(history_file.tell())
+            self._history_file = history_file
+            self._history_offsets = offsets
+        return self._history_file
+
+    def _spill(self, message: Message) -> None:
+        """Append a message to the history file."""
+        history_file = self._open_history()
+        self._history_offsets.append(history_file.seek(0, 2))
+        history_file.write(json.dumps([message.plain_text, message.fg, message.count]).encode() + b"\n")
+        self.spilled += 1
+
+    def get_messages(self, start: int, stop: int) -> List[Message]:
+        """Return the messages from `start` up to `stop` of the whole history, oldest first.
+
+        Messages which are no longer in memory are read back from the history file.
+        """
+        if self.spilled and start < stop:
+            self._open_history()  # Makes sure `spilled` matches the file.
+        start, stop = max(0, start), min(stop, len(self))
+        result: List[Message] = []
+        if start < min(stop, self.spilled):
+            history_file = self._open_history()
+            history_file.seek(self._history_offsets[start])
+            for _ in range(start, min(stop, self.spilled)):
+                text, fg, count = json.loads(history_file.readline())
+                message = Message(text, tuple(fg))
+                message.count = count
+                result.append(message)
+        # Indexing a deque is quick near either end, unlike slicing it from the start.
+        result.extend(
+            self.messages[i] for i in range(max(0, start - self.spilled), max(0, stop - self.spilled))
+        )
+        return result
 
     def render(
         self, console: tcod.Console, x: int, y: int, width: int, height: int,
@@ -78,7 +229,7 @@ class MessageLog:
         y_offset = height - 1
 
         for message in reversed(messages):
-            for line in reversed(list(cls.wrap(message.full_text, width))):
+            for line in reversed(message.get_lines(width)):
                 console.print(x=x, y=y + y_offset, string=line, fg=message.fg)
                 y_offset -= 1
                 if y_offset < 0:
@@ -0,0 +1,16 @@
+"""Helpers to load objects pickled by older versions of the game"""
+from typing import Any, Mapping
+
+
+def restore_slots(obj: Any, state: Any, renamed: Mapping[str, str] = {}) -> None:
+    """Set the attributes of an object using __slots__ from its pickled state.
+
+    The state is either the (None, slots) pair pickle makes for such objects,
+    or the __dict__ of an object saved before its class had __slots__.
+    Attributes which were renamed since are given by `renamed`, old name to new name.
+    """
+    if isinstance(state, tuple):
+        dict_state, slots_state = state
+        state = {**(dict_state or {}), **(slots_state or {})}
+    for name, value in state.items():
+        object.__setattr__(obj, renamed.get(name, name), value)
@@ -1,18 +1,23 @@
 """Handles randomness in the game"""
 from __future__ import annotations
 
+import atexit
+import concurrent.futures
+import concurrent.futures.process
+import multiprocessing
 import random
-from typing import Dict, Iterator, List, Tuple, TYPE_CHECKING
+from typing import Dict, Iterator, List, Optional, Set, Tuple, TYPE_CHECKING
 
+import numpy as np  # type: ignore
 import tcod
 
+from entity import Entity
 import entity_factories
-from game_map import GameMap
+from game_map import floor_rng, GameMap
 import tile_types
 
 if TYPE_CHECKING:
     from engine import Engine
-    from entity import Entity
 
 max_items_by_floor = [
     (1, 1),
@@ -59,6 +64,7 @@ def get_entities_at_random(
         weighted_chances_by_floor: Dict[int, List[Tuple[Entity, int]]],
         number_of_entities: int,
         floor: int,
+        rng: random.Random,
 ) -> List[Entity]:
     """Random chance for entity spawning on the map"""
     entity_weighted_chances = {}
@@ -76,7 +82,7 @@ def get_entities_at_random(
     entities = list(entity_weighted_chances.keys())
     entity_weighted_chances_values = list(entity_weighted_chances.values())
 
-    chosen_entities = random.choices(
+    chosen_entities = rng.choices(
         entities, weights=entity_weighted_chances_values, k=number_of_entities
     )
 
@@ -114,31 +120,58 @@ class RectangularRoom:
         )
 
 
+# Names of the prototypes in entity_factories, so floor plans can refer to them.
+prototype_names: Dict[Entity, str] = {
+    value: name for name, value in vars(entity_factories).items() if isinstance(value, Entity)
+}
+
+
+class FloorPlan:
+    """Everything needed to build a floor, with the entities to spawn given by name.
+
+    Plans are small and picklable, so they can be made ahead of time in another process.
+    """
+    def __init__(self, width: int, height: int):
+        self.tiles = np.full(
+            (width, height), fill_value=tile_types.wall, dtype=tile_types.tile_id_dt, order="F"
+        )
+        self.player_location: Optional[Tuple[int, int]] = None
+        self.downstairs_location = (0, 0)
+        self.upstairs_location: Optional[Tuple[int, int]] = None
+        self.spawns: List[Tuple[str, int, int]] = []  # Prototype name and location
+        self.occupied_locations: Set[Tuple[int, int]] = set()
+
+    def add_spawn(self, entity: Entity, x: int, y: int) -> None:
+        """Plan to spawn a copy of an entity_factories prototype at the given location."""
+        self.spawns.append((prototype_names[entity], x, y))
+        self.occupied_locations.add((x, y))
+
+
 def place_entities(
-        room: RectangularRoom, dungeon: GameMap, floor_number: int
+        room: RectangularRoom, dungeon: FloorPlan, floor_number: int, rng: random.Random
 ) -> None:
     """Spawn entities in rooms"""
-    number_of_monsters = random.randint(0, get_max_value_for_floor(max_monsters_by_floor, floor_number))
-    number_of_items = random.randint(0, get_max_value_for_floor(max_items_by_floor, floor_number))
+    number_of_monsters = rng.randint(0, get_max_value_for_floor(max_monsters_by_floor, floor_number))
+    number_of_items = rng.randint(0, get_max_value_for_floor(max_items_by_floor, floor_number))
 
-    monsters: List[Entity] = get_entities_at_random(enemy_chances, number_of_monsters, floor_number)
-    items: List[Entity] = get_entities_at_random(item_chances, number_of_items, floor_number)
+    monsters: List[Entity] = get_entities_at_random(enemy_chances, number_of_monsters, floor_number, rng)
+    items: List[Entity] = get_entities_at_random(item_chances, number_of_items, floor_number, rng)
 
     for entity in monsters + items:
-        x = random.randint(room.x1 + 1, room.x2 - 1)
-        y = random.randint(room.y1 + 1, room.y2 - 1)
+        x = rng.randint(room.x1 + 1, room.x2 - 1)
+        y = rng.randint(room.y1 + 1, room.y2 - 1)
 
-        if not any(entity.x == x and entity.y == y for entity in dungeon.entities):
-            entity.spawn(dungeon, x, y)
+        if (x, y) not in dungeon.occupied_locations:
+            dungeon.add_spawn(entity, x, y)
 
 
 def tunnel_between(
-        start: Tuple[int, int], end: Tuple[int, int]
+        start: Tuple[int, int], end: Tuple[int, int], rng: random.Random
 ) -> Iterator[Tuple[int, int]]:
     """Return an L-shaped tunnel between these two points."""
     x1, y1 = start
     x2, y2 = end
-    if random.random() < 0.5:  # 50% chance.
+    if rng.random() < 0.5:  # 50% chance.
         # Move horizontally, then vertically.
         corner_x, corner_y = x2, y1
     else:
@@ -152,28 +185,36 @@ def tunnel_between(
         yield x, y
 
 
-def generate_dungeon(
+def plan_dungeon(
+        *,
+        seed: int,
+        floor: int,
         max_rooms: int,
         room_min_size: int,
         room_max_size: int,
         map_width: int,
         map_height: int,
-        engine: Engine,
-) -> GameMap:
-    """Generate a new dungeon map."""
-    player = engine.player
-    dungeon = GameMap(engine, map_width, map_height, entities=[player])
+) -> FloorPlan:
+    """Generate the plan of a new dungeon map.
+
+    The result only depends on the arguments: the layout and the entities are drawn
+    from separate random streams of the world's `seed` for this `floor`, so changing
+    the spawn tables doesn't change the layout of the floors.
+    """
+    dungeon = FloorPlan(map_width, map_height)
+    layout_rng = floor_rng(seed, floor, "layout")
+    spawn_rng = floor_rng(seed, floor, "spawns")
 
     rooms: List[RectangularRoom] = []
 
     center_of_last_room = (0, 0)
 
     for r in range(max_rooms):
-        room_width = random.randint(room_min_size, room_max_size)
-        room_height = random.randint(room_min_size, room_max_size)
+        room_width = layout_rng.randint(room_min_size, room_max_size)
+        room_height = layout_rng.randint(room_min_size, room_max_size)
 
-        x = random.randint(0, dungeon.width - room_width - 1)
-        y = random.randint(0, dungeon.height - room_height - 1)
+        x = layout_rng.randint(0, map_width - room_width - 1)
+        y = layout_rng.randint(0, map_height - room_height - 1)
 
         # "RectangularRoom" class makes rectangles easier to work with
         new_room = RectangularRoom(x, y, room_width, room_height)
@@ -188,15 +229,16 @@ def generate_dungeon(
 
         if len(rooms) == 0:
             # The first room, where the player starts.
-            player.place(*new_room.center, dungeon)
+            dungeon.player_location = new_room.center
+            dungeon.occupied_locations.add(new_room.center)
         else:  # All rooms after the first.
             # Dig out a tunnel between this room and the previous one.
-            for x, y in tunnel_between(rooms[-1].center, new_room.center):
+            for x, y in tunnel_between(rooms[-1].center, new_room.center, layout_rng):
                 dungeon.tiles[x, y] = tile_types.floor
 
             center_of_last_room = new_room.center
 
-        place_entities(new_room, dungeon, engine.game_world.current_floor)
+        place_entities(new_room, dungeon, floor, spawn_rng)
 
         dungeon.tiles[center_of_last_room] = tile_types.down_stairs
         dungeon.downstairs_location = center_of_last_room
@@ -204,4 +246,58 @@ def generate_dungeon(
         # Finally, append the new room to the list.
         rooms.append(new_room)
 
+    if floor > 1 and dungeon.player_location is not None:
+        # The player arrives from the floor above on the stairs going back up.
+        dungeon.tiles[dungeon.player_location] = tile_types.up_stairs
+        dungeon.upstairs_location = dungeon.player_location
+
     return dungeon
+
+
+def build_dungeon(plan: FloorPlan, engine: Engine) -> GameMap:
+    """Build the map of a floor plan, spawn its entities and move the player onto it."""
+    width, height = plan.tiles.shape
+    dungeon = GameMap(engine, width, height, entities=[engine.player])
+    dungeon.tiles = plan.tiles.copy(order="F")
+    dungeon.downstairs_location = plan.downstairs_location
+    dungeon.upstairs_location = plan.upstairs_location
+
+    if plan.player_location is not None:
+        engine.player.place(*plan.player_location, dungeon)
+
+    for name, x, y in plan.spawns:
+        getattr(entity_factories, name).spawn(dungeon, x, y)
+
+    return dungeon
+
+
+_executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+
+def _shutdown_executor() -> None:
+    """Stop the background process, without waiting for a plan nobody will use."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def submit_plan_dungeon(**kwargs: int) -> concurrent.futures.Future:
+    """Start making a plan with `plan_dungeon` in a background process, and return its future.
+
+    The process is spawned rather than forked, so it doesn't inherit the window or the
+    game's threads.  If it died then a new one is started.
+    """
+    global _executor
+    if _executor is not None:
+        try:
+            return _executor.submit(plan_dungeon, **kwargs)
+        except concurrent.futures.process.BrokenProcessPool:
+            _shutdown_executor()  # The process died, start another one.
+    _executor = concurrent.futures.ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("spawn")
+    )
+    return _executor.submit(plan_dungeon, **kwargs)
+
+
+atexit.register(_shutdown_executor)
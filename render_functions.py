@@ -17,7 +17,7 @@ def get_names_at_location(x: int, y: int, game_map: GameMap) -> str:
         return ""
 
     names = ", ".join(
-        entity.name for entity in game_map.entities if entity.x == x and entity.y == y
+        entity.name for entity in game_map.get_entities_at_location(x, y)
     )
 
     return names.capitalize()
@@ -49,6 +49,15 @@ def render_dungeon_level(
     console.print(x=x, y=y, string=F"Dungeon level: {dungeon_level}")
 
 
+def render_save_status(console: Console, status: str, location: Tuple[int, int]) -> None:
+    """Render whether a save is being written or the last one failed, see savefile.BackgroundSaver.status"""
+    x, y = location
+    if status == "saving":
+        console.print(x=x, y=y, string="Saving...")
+    elif status == "failed":
+        console.print(x=x, y=y, string="Save failed!", fg=color.error)
+
+
 def render_names_at_mouse_location(
         console: Console, x: int, y: int, engine: Engine
 ) -> None:
@@ -0,0 +1,692 @@
+#!/usr/bin/env python3
+"""Versioned save file container, with the NumPy arrays stored as raw blocks
+
+A save file is laid out as:
+
+- MAGIC, then the format version and the length of the block table as little endian uint32s,
+- since version 2, a random uint64 identifying this checkpoint,
+- since version 3, the metadata of the save: the floor, the player's level and the turn
+  as uint32, uint32 and uint64, then the time it was saved at as a float64 Unix timestamp,
+- the block table, a uint64 (offset, size) pair for each block, followed since version 4
+  by the uint32 CRC32 of the block, so damaged blocks are found before being loaded,
+- the blocks, each starting on a BLOCK_ALIGNMENT boundary.
+
+Block 0 is the zlib compressed pickle of the saved object.  Every NumPy array in
+the object is left out of that pickle and written raw in a block of its own, so the
+map layers and entity columns can be memory-mapped when loading instead of being read
+and decompressed.  So is the data of every FileBlock in the object, which is only read
+from its own file when the save is written.
+
+A save file can be followed by a journal, `<filename>.journal`, of the changes made
+to its blocks since, see JournaledSave.  The journal starts with JOURNAL_MAGIC and the
+identifier of the checkpoint it applies to, then holds one record per save, each made
+of its size and CRC32 as uint32s, the metadata of the save since version 3, and the
+delta of every block.  So `read_metadata` can tell about a save without loading it.
+"""
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import io
+import lzma
+import mmap
+import os
+import pickle
+import struct
+import time
+from typing import Any, BinaryIO, Dict, List, NamedTuple, Optional, Tuple
+import zlib
+
+import numpy as np  # type: ignore
+
+MAGIC = b"BCSAVE\r\n"
+VERSION = 4
+BLOCK_ALIGNMENT = 64
+_HEADER = struct.Struct("<8sII")
+_CHECKPOINT_ID = struct.Struct("<Q")
+_METADATA = struct.Struct("<IIQd")
+_BLOCK_ENTRY = struct.Struct("<QQI")
+_OLD_BLOCK_ENTRY = struct.Struct("<QQ")  # Before version 4, without the CRC32
+
+JOURNAL_MAGIC = b"BCJOURN\n"
+_RECORD_HEADER = struct.Struct("<II")
+_BLOCK_COUNT = struct.Struct("<I")
+_BLOCK_DELTA = struct.Struct("<BI")  # Kind of change and size of its data
+
+# Kinds of block changes in a journal record
+_SAME = 0  # The block didn't change.
+_XOR = 1  # The block kept its size, the data is the compressed XOR of the old and new block.
+_DEFLATE = 2  # The data is the new block, compressed with the old one as the zlib dictionary.
+_COPY = 3  # The data is the uint32 index of the old block which is the new one.
+_BLOCK_INDEX = struct.Struct("<I")
+
+
+LZMA_MAGIC = b"\xfd7zXZ\x00"  # Saves from before this format start with it.
+
+
+class SaveFileError(Exception):
+    """Raised when a file isn't a save file this version of the game can read"""
+
+
+class SaveMetadata(NamedTuple):
+    """What a save file tells about itself without being loaded"""
+    version: int
+    floor: int
+    level: int  # Of the player
+    turn: int
+    timestamp: float  # When it was saved, in seconds since the epoch
+
+
+class _Header(NamedTuple):
+    """The header of a save file"""
+    version: int
+    checkpoint_id: int  # 0 before version 2
+    metadata: Optional[SaveMetadata]  # None before version 3
+    table: List[Tuple[int, int]]  # Offset and size of each block
+
+
+class FileBlock:
+    """Data saved as a block of its own, which stays in its file until the save is written.
+
+    The file is opened right away and kept open until `close`, so that it can still be
+    read once it's removed.  `key` identifies the data: a journaled save doesn't write
+    a block again while the save already holds one with the same key, see JournaledSave.
+    Plain pickle saves the data itself.
+    """
+
+    def __init__(self, filename: str, key: bytes):
+        self.key = key
+        self._file = open(filename, "rb")
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """Pickle the data itself, which closes the file as nothing else will"""
+        data = self.read()
+        self.close()
+        return bytes, (data,)
+
+    def read(self) -> bytes:
+        """Return the data of this block"""
+        self._file.seek(0)
+        return self._file.read()
+
+    def close(self) -> None:
+        """Close the file of this block, it can't be read after this."""
+        self._file.close()
+
+
+def _block_data(block: Any) -> Any:
+    """Return the data of a block of a snapshot, reading it if it's a FileBlock"""
+    return block.read() if isinstance(block, FileBlock) else block
+
+
+class _Pickler(pickle.Pickler):
+    """Pickler moving the NumPy arrays and the FileBlocks out of the pickle, into raw blocks"""
+
+    def __init__(self, file: BinaryIO):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.blocks: List[Any] = [b""]  # Block 0 is for the pickle itself.
+        self._array_ids: Dict[int, Tuple[Any, ...]] = {}
+        self._arrays: List[np.ndarray] = []  # Keeps the arrays in _array_ids alive.
+
+    def persistent_id(self, obj: Any) -> Optional[Tuple[Any, ...]]:
+        """Return the reference to the block of a NumPy array or a FileBlock, or None for any other object"""
+        if isinstance(obj, FileBlock):
+            self.blocks.append(obj)
+            return ("bytes", len(self.blocks) - 1)
+        if not isinstance(obj, np.ndarray) or obj.dtype.hasobject:
+            return None
+        pid = self._array_ids.get(id(obj))
+        if pid is None:
+            order = "F" if obj.flags.f_contiguous and not obj.flags.c_contiguous else "C"
+            pid = ("array", len(self.blocks), obj.dtype, obj.shape, order)
+            self.blocks.append(obj.tobytes(order=order))
+            self._array_ids[id(obj)] = pid
+            self._arrays.append(obj)
+        return pid
+
+
+class _Unpickler(pickle.Unpickler):
+    """Unpickler putting back the arrays and the data of the FileBlocks taken out by _Pickler"""
+
+    def __init__(self, file: BinaryIO, blocks: List[Any]):
+        super().__init__(file)
+        self._blocks = blocks
+        self._arrays: Dict[int, np.ndarray] = {}
+
+    def persistent_load(self, pid: Tuple[Any, ...]) -> Any:
+        """Return the array of a block, or the data of a FileBlock as a buffer"""
+        kind, block, *array_info = pid
+        if kind == "bytes":
+            return self._blocks[block]
+        if kind != "array":
+            raise pickle.UnpicklingError(f"Unknown reference in save file: {kind!r}")
+        dtype, shape, order = array_info
+        array = self._arrays.get(block)
+        if array is None:
+            array = self._arrays[block] = np.ndarray(
+                shape, dtype=dtype, buffer=self._blocks[block], order=order
+            )
+        return array
+
+
+def _new_checkpoint_id() -> int:
+    """Return a random identifier for a new checkpoint"""
+    return int.from_bytes(os.urandom(_CHECKPOINT_ID.size), "little")
+
+
+def _remove_file(filename: str) -> None:
+    """Remove a file if it exists."""
+    try:
+        os.remove(filename)
+    except FileNotFoundError:
+        pass
+
+
+def _write_atomically(filename: str, data: bytes) -> None:
+    """Write a file under a temporary name first and then rename it, so it's never left half written."""
+    temp_filename = f"{filename}.tmp"
+    with open(temp_filename, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_filename, filename)
+
+
+class Snapshot:
+    """The state of an object at the time it was taken, ready to be written as a save file.
+
+    Taking the snapshot only pickles the object, while reading its FileBlocks, compressing
+    and writing it can be done later, from another thread.  The `floor`, `level` and `turn`
+    are saved in the metadata, see read_metadata.  Call `close` once it's written.
+    """
+
+    def __init__(self, obj: Any, floor: int = 0, level: int = 0, turn: int = 0):
+        pickled = io.BytesIO()
+        pickler = _Pickler(pickled)
+        pickler.dump(obj)
+        self.blocks = pickler.blocks
+        self.blocks[0] = pickled.getvalue()
+        self.metadata = _METADATA.pack(floor, level, turn, time.time())
+
+    def close(self) -> None:
+        """Close the files of the FileBlocks of this snapshot."""
+        for block in self.blocks:
+            if isinstance(block, FileBlock):
+                block.close()
+
+    def to_bytes(self, checkpoint_id: int = 0) -> bytes:
+        """Return the save file of this snapshot"""
+        blocks = [zlib.compress(self.blocks[0], 6), *map(_block_data, self.blocks[1:])]
+
+        table_size = _BLOCK_ENTRY.size * len(blocks)
+        offset = _HEADER.size + _CHECKPOINT_ID.size + _METADATA.size + table_size
+        table = []
+        for block in blocks:
+            offset += -offset % BLOCK_ALIGNMENT
+            table.append(_BLOCK_ENTRY.pack(offset, len(block), zlib.crc32(block)))
+            offset += len(block)
+
+        output = io.BytesIO()
+        output.write(_HEADER.pack(MAGIC, VERSION, len(blocks)))
+        output.write(_CHECKPOINT_ID.pack(checkpoint_id))
+        output.write(self.metadata)
+        output.write(b"".join(table))
+        for block in blocks:
+            output.write(b"\0" * (-output.tell() % BLOCK_ALIGNMENT))
+            output.write(block)
+        return output.getvalue()
+
+    def write(self, filename: str) -> int:
+        """Write this snapshot to a file, and return the identifier of this new checkpoint.
+
+        The file is replaced atomically, and any journal of the previous save is removed.
+        """
+        checkpoint_id = _new_checkpoint_id()
+        _write_atomically(filename, self.to_bytes(checkpoint_id))
+        _remove_file(f"{filename}.journal")
+        return checkpoint_id
+
+
+def _encode_delta(old_blocks: List[Any], new_blocks: List[Any]) -> bytes:
+    """Return the journal record turning the old blocks into the new ones.
+
+    FileBlocks are only read if the old blocks hold none with the same key, and as
+    their data isn't kept the blocks replacing them are compressed on their own.
+    """
+    old_keys = {block.key: index for index, block in enumerate(old_blocks) if isinstance(block, FileBlock)}
+    output = io.BytesIO()
+    output.write(_BLOCK_COUNT.pack(len(new_blocks)))
+    for index, new in enumerate(new_blocks):
+        old = old_blocks[index] if index < len(old_blocks) else b""
+        if isinstance(new, FileBlock):
+            if new.key in old_keys:
+                kept = old_keys[new.key]
+                kind, data = (_SAME, b"") if kept == index else (_COPY, _BLOCK_INDEX.pack(kept))
+                output.write(_BLOCK_DELTA.pack(kind, len(data)))
+                output.write(data)
+                continue
+            new = new.read()
+        if isinstance(old, FileBlock):
+            kind, data = _DEFLATE, zlib.compress(new, 6)
+        elif new == old:
+            kind, data = _SAME, b""
+        elif len(new) == len(old) and index > 0:  # Things move around in the pickle, so it isn't XORed.
+            changes = np.bitwise_xor(np.frombuffer(old, np.uint8), np.frombuffer(new, np.uint8))
+            kind, data = _XOR, zlib.compress(changes.tobytes(), 6)
+        else:
+            compressor = zlib.compressobj(6, zdict=old) if old else zlib.compressobj(6)
+            kind, data = _DEFLATE, compressor.compress(new) + compressor.flush()
+        output.write(_BLOCK_DELTA.pack(kind, len(data)))
+        output.write(data)
+    return output.getvalue()
+
+
+def _apply_delta(old_blocks: List[Any], record: memoryview) -> List[Any]:
+    """Return the blocks made by applying a journal record to the old ones"""
+    (block_count,) = _BLOCK_COUNT.unpack_from(record)
+    offset = _BLOCK_COUNT.size
+    new_blocks: List[Any] = []
+    for index in range(block_count):
+        old = old_blocks[index] if index < len(old_blocks) else b""
+        kind, size = _BLOCK_DELTA.unpack_from(record, offset)
+        offset += _BLOCK_DELTA.size
+        data = record[offset: offset + size]
+        offset += size
+        if kind == _SAME:
+            new_blocks.append(old)
+        elif kind == _XOR:
+            changes = np.frombuffer(zlib.decompress(data), np.uint8)
+            new_blocks.append(bytearray(np.bitwise_xor(np.frombuffer(old, np.uint8), changes).tobytes()))
+        elif kind == _DEFLATE:
+            decompressor = zlib.decompressobj(zdict=bytes(old)) if len(old) else zlib.decompressobj()
+            new_blocks.append(bytearray(decompressor.decompress(data) + decompressor.flush()))
+        elif kind == _COPY:
+            new_blocks.append(old_blocks[_BLOCK_INDEX.unpack_from(data)[0]])
+        else:
+            raise SaveFileError(f"Unknown kind of change in save journal: {kind}")
+    return new_blocks
+
+
+def _unpack_metadata(version: int, data: Any, offset: int = 0) -> SaveMetadata:
+    """Return the metadata packed in `data` at `offset`"""
+    return SaveMetadata(version, *_METADATA.unpack_from(data, offset))
+
+
+def _read_header(data: memoryview) -> _Header:
+    """Read the header of a save file, and check its blocks are all there and intact."""
+    try:
+        magic, version, block_count = _HEADER.unpack_from(data)
+    except struct.error:
+        raise SaveFileError("Not a save file") from None
+    if magic != MAGIC:
+        raise SaveFileError("Not a save file")
+    if not 1 <= version <= VERSION:
+        raise SaveFileError(f"Save file version {version} is not supported")
+
+    offset = _HEADER.size
+    block_entry = _BLOCK_ENTRY if version >= 4 else _OLD_BLOCK_ENTRY
+    checkpoint_id = 0  # Version 1 files have no identifier, and so no journal.
+    metadata = None
+    try:
+        if version >= 2:
+            (checkpoint_id,) = _CHECKPOINT_ID.unpack_from(data, offset)
+            offset += _CHECKPOINT_ID.size
+        if version >= 3:
+            metadata = _unpack_metadata(version, data, offset)
+            offset += _METADATA.size
+        entries = [
+            block_entry.unpack_from(data, offset + i * block_entry.size)
+            for i in range(block_count)
+        ]
+    except struct.error:
+        raise SaveFileError("Save file is cut short") from None
+    table = [(block_offset, size) for block_offset, size, *_ in entries]
+    if not table or any(block_offset + size > len(data) for block_offset, size in table):
+        raise SaveFileError("Save file is cut short")
+    for index, (block_offset, size, *crc) in enumerate(entries):
+        if crc and zlib.crc32(data[block_offset: block_offset + size]) != crc[0]:
+            raise SaveFileError(f"Save file is damaged, block {index} doesn't match its CRC32")
+    return _Header(version, checkpoint_id, metadata, table)
+
+
+def _read_blocks(data: memoryview) -> Tuple[_Header, List[Any]]:
+    """Return the header and the blocks of a save file's data, with the pickle decompressed"""
+    header = _read_header(data)
+    blocks: List[Any] = [data[offset: offset + size] for offset, size in header.table]
+    blocks[0] = zlib.decompress(blocks[0])
+    return header, blocks
+
+
+def _open_journal(filename: str, header: _Header) -> Optional[BinaryIO]:
+    """Open the journal of a checkpoint, positioned on its first record.
+
+    None is returned if there is no journal, or if it belongs to another checkpoint.
+    """
+    if header.checkpoint_id == 0:
+        return None
+    try:
+        f = open(filename, "rb")
+    except FileNotFoundError:
+        return None
+    journal_header = f.read(len(JOURNAL_MAGIC) + _CHECKPOINT_ID.size)
+    if (
+            journal_header[: len(JOURNAL_MAGIC)] != JOURNAL_MAGIC
+            or len(journal_header) < len(JOURNAL_MAGIC) + _CHECKPOINT_ID.size
+            or _CHECKPOINT_ID.unpack_from(journal_header, len(JOURNAL_MAGIC))[0] != header.checkpoint_id
+    ):
+        f.close()
+        return None
+    return f
+
+
+def _read_journal(
+        filename: str, header: _Header
+) -> Tuple[List[Tuple[Optional[SaveMetadata], memoryview]], int]:
+    """Return the metadata and block deltas of the intact records of a checkpoint's journal,
+    and the size these records take in the file.  The metadata is None before version 3.
+
+    Reading stops at the first damaged record, such as one cut off by a crash while it was written.
+    """
+    f = _open_journal(filename, header)
+    if f is None:
+        return [], 0
+    with f:
+        offset = f.tell()
+        data = memoryview(f.read())
+    metadata_size = _METADATA.size if header.version >= 3 else 0
+
+    records = []
+    position = 0
+    while position + _RECORD_HEADER.size <= len(data):
+        size, crc = _RECORD_HEADER.unpack_from(data, position)
+        record = data[position + _RECORD_HEADER.size: position + _RECORD_HEADER.size + size]
+        if len(record) != size or zlib.crc32(record) != crc:
+            break
+        metadata = _unpack_metadata(header.version, record) if metadata_size else None
+        records.append((metadata, record[metadata_size:]))
+        position += _RECORD_HEADER.size + size
+    return records, offset + position
+
+
+def _load_blocks(data: Any, journal_filename: Optional[str]) -> List[Any]:
+    """Return the blocks of a save file's data, brought up to date with its journal if given"""
+    view = memoryview(data)
+    if view.readonly:
+        view = memoryview(bytearray(view))
+    header, blocks = _read_blocks(view)
+    if journal_filename is not None:
+        for _, delta in _read_journal(journal_filename, header)[0]:
+            blocks = _apply_delta(blocks, delta)
+    return blocks
+
+
+def _unpickle(blocks: List[Any]) -> Any:
+    """Return the object saved in the given blocks"""
+    return _Unpickler(io.BytesIO(blocks[0]), blocks).load()
+
+
+def dumps(obj: Any) -> bytes:
+    """Return the save file of an object"""
+    snapshot = Snapshot(obj)
+    try:
+        return snapshot.to_bytes()
+    finally:
+        snapshot.close()
+
+
+def loads(data: Any) -> Any:
+    """Return the object saved in a save file's bytes, or any buffer of them.
+
+    The arrays of the object share the memory of `data`, which is copied first if it's read-only.
+    """
+    return _unpickle(_load_blocks(data, None))
+
+
+def save(obj: Any, filename: str, **metadata: int) -> None:
+    """Save an object to a file, see Snapshot, and wait until it's written.
+
+    The file is written by background_saver, after the saves it was already writing,
+    so that the journaled saves it makes to this file next know the file was replaced.
+    """
+    background_saver.save(obj, filename, **metadata).result()
+
+
+def load(filename: str, mmap_arrays: bool = True) -> Any:
+    """Load an object from a save file, and the changes in its journal if it has one.
+
+    If `mmap_arrays` is True then the arrays which didn't change since the checkpoint
+    are copy-on-write mappings of the file instead of copies of it.
+    Otherwise the whole file is read at once.
+    Saves from before this format, pickled and compressed with LZMA, can be loaded too.
+    """
+    with open(filename, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            f.seek(0)
+            return pickle.loads(lzma.decompress(f.read()))
+        f.seek(0)
+        if mmap_arrays:
+            data: Any = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        else:
+            data = bytearray(f.read())  # Writable, like the mapping.
+    return _unpickle(_load_blocks(data, f"{filename}.journal"))
+
+
+def read_metadata(filename: str) -> Optional[SaveMetadata]:
+    """Return the metadata of the latest save in a file, without loading it.
+
+    The blocks of the file and the records of its journal are checked against their CRC32,
+    but nothing is unpickled.  None is returned for saves from before metadata was saved.
+    SaveFileError is raised if the file isn't a save the game can load.
+    """
+    with open(filename, "rb") as f:
+        if f.read(len(LZMA_MAGIC)) == LZMA_MAGIC:
+            return None
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            raise SaveFileError("Not a save file") from None
+    with data, memoryview(data) as view:
+        header = _read_header(view)
+    if header.metadata is None:
+        return None
+    records, _ = _read_journal(f"{filename}.journal", header)
+    return records[-1][0] if records else header.metadata
+
+
+def delete(filename: str) -> None:
+    """Delete a save file and its journal, if they exist."""
+    _remove_file(filename)
+    _remove_file(f"{filename}.journal")
+
+
+class JournaledSave:
+    """Saves an object to the same file again and again, only writing what changed each time.
+
+    Each save appends a record of the changes since the previous one to the file's journal.
+    A new full checkpoint is written instead, which empties the journal, on the first save
+    if the file can't be read or was replaced by something else since the previous save,
+    every `checkpoint_interval` saves, and once the journal would be bigger than the checkpoint.
+    The FileBlocks of a snapshot which the save already holds are neither read nor written,
+    and only their keys are kept in memory.  Use one instance per file, from one thread.
+    """
+
+    def __init__(self, filename: str, checkpoint_interval: int = 50):
+        self.filename = filename
+        self.journal_filename = f"{filename}.journal"
+        self.checkpoint_interval = checkpoint_interval
+        # What the file holds, journal included, with the FileBlocks saved last instead of their data
+        self._blocks: Optional[List[Any]] = None
+        self._checkpoint_id = 0
+        self._checkpoint_size = 0
+        self._records = 0
+        self._journal_size = 0
+
+    def _resume(self) -> None:
+        """Continue from the save already in the file, if it can be read."""
+        try:
+            with open(self.filename, "rb") as f:
+                data = f.read()
+            header, self._blocks = _read_blocks(memoryview(bytearray(data)))
+        except (OSError, SaveFileError, zlib.error):
+            return
+        if header.version != VERSION:
+            return  # Its journal records aren't in the current format, start a new checkpoint.
+        self._checkpoint_id = header.checkpoint_id
+        self._checkpoint_size = len(data)
+        records, self._journal_size = _read_journal(self.journal_filename, header)
+        for _, delta in records:
+            self._blocks = _apply_delta(self._blocks, delta)
+        self._records = len(records)
+        if records:
+            with open(self.journal_filename, "r+b") as f:
+                f.truncate(self._journal_size)  # Cut off any damaged record.
+
+    def _is_up_to_date(self) -> bool:
+        """Return True if the file and its journal still hold what this instance last wrote or read"""
+        try:
+            with open(self.filename, "rb") as f:
+                header = f.read(_HEADER.size + _CHECKPOINT_ID.size)
+                size = f.seek(0, io.SEEK_END)
+            # An empty journal is started over anyway, whatever the file holds.
+            journal_size = os.path.getsize(self.journal_filename) if self._journal_size else 0
+        except OSError:
+            return False
+        return (
+                len(header) == _HEADER.size + _CHECKPOINT_ID.size
+                and _CHECKPOINT_ID.unpack_from(header, _HEADER.size)[0] == self._checkpoint_id
+                and size == self._checkpoint_size
+                and journal_size == self._journal_size
+        )
+
+    def write(self, snapshot: Snapshot) -> None:
+        """Save a snapshot to the file, as a journal record or as a new checkpoint."""
+        try:
+            self._write(snapshot)
+        except BaseException:
+            self._blocks = None  # Find out what was written from the file on the next save.
+            raise
+
+    def _write(self, snapshot: Snapshot) -> None:
+        """Save a snapshot to the file, see write"""
+        if self._blocks is None:
+            self._resume()
+        if (
+                self._blocks is None
+                or self._checkpoint_id == 0
+                or self._records >= self.checkpoint_interval
+                or not self._is_up_to_date()
+        ):
+            self._write_checkpoint(snapshot)
+            return
+
+        record = snapshot.metadata + _encode_delta(self._blocks, snapshot.blocks)
+        if self._journal_size + len(record) > self._checkpoint_size:
+            self._write_checkpoint(snapshot)  # Compact the journal.
+            return
+
+        with open(self.journal_filename, "ab") as f:
+            if self._journal_size == 0:
+                f.truncate(0)  # Anything left there belongs to another checkpoint.
+                f.write(JOURNAL_MAGIC + _CHECKPOINT_ID.pack(self._checkpoint_id))
+            f.write(_RECORD_HEADER.pack(len(record), zlib.crc32(record)))
+            f.write(record)
+            f.flush()
+            os.fsync(f.fileno())
+            self._journal_size = f.tell()
+        self._records += 1
+        self._blocks = list(snapshot.blocks)
+
+    def _write_checkpoint(self, snapshot: Snapshot) -> None:
+        """Write the whole snapshot as the file's new checkpoint, with an empty journal."""
+        data = snapshot.to_bytes(_new_checkpoint_id())
+        _write_atomically(self.filename, data)
+        _remove_file(self.journal_filename)
+        self._checkpoint_id = _CHECKPOINT_ID.unpack_from(data, _HEADER.size)[0]
+        self._checkpoint_size = len(data)
+        self._records = 0
+        self._journal_size = 0
+        self._blocks = list(snapshot.blocks)
+
+
+class BackgroundSaver:
+    """Writes save files from a background thread, one after the other.
+
+    The snapshot of the object is taken on the calling thread, so what gets saved
+    is the state at the time of the call, and the caller can carry on changing it.
+    """
+
+    def __init__(self) -> None:
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._last_save: Optional[concurrent.futures.Future] = None
+        self._journals: Dict[str, JournaledSave] = {}  # Only used from the worker thread
+
+    def save(
+            self, obj: Any, filename: str, journaled: bool = False, **metadata: int
+    ) -> concurrent.futures.Future:
+        """Start saving an object to a file, and return the future of the write.
+
+        If `journaled` is True then only the changes since the last journaled save
+        to this file are written, see JournaledSave.  The `metadata` is given to Snapshot.
+        """
+        snapshot = Snapshot(obj, **metadata)
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="save"
+            )
+        self._last_save = self._executor.submit(self._write, snapshot, filename, journaled)
+        return self._last_save
+
+    def _write(self, snapshot: Snapshot, filename: str, journaled: bool) -> None:
+        """Write a snapshot, from the worker thread"""
+        try:
+            if journaled:
+                journal = self._journals.get(filename)
+                if journal is None:
+                    journal = self._journals[filename] = JournaledSave(filename)
+                journal.write(snapshot)
+            else:
+                self._journals.pop(filename, None)  # Its idea of the file's content is out of date.
+                snapshot.write(filename)
+        finally:
+            snapshot.close()
+
+    @property
+    def status(self) -> str:
+        """State of the latest save: "idle" if there was none, "saving", "saved" or "failed"."""
+        if self._last_save is None:
+            return "idle"
+        if not self._last_save.done():
+            return "saving"
+        return "failed" if self._last_save.exception() else "saved"
+
+    def wait(self) -> None:
+        """Wait until every save started so far is done, `status` tells how the latest one went."""
+        if self._last_save is not None:
+            concurrent.futures.wait([self._last_save])
+
+
+background_saver = BackgroundSaver()
+
+
+def main() -> None:
+    """List the save files given on the command line, with their metadata"""
+    parser = argparse.ArgumentParser(description="Check save files and show their metadata")
+    parser.add_argument("files", nargs="+", help="save files to check")
+    for filename in parser.parse_args().files:
+        try:
+            metadata = read_metadata(filename)
+        except (OSError, SaveFileError) as exc:
+            print(f"{filename}: invalid ({exc})")
+            continue
+        if metadata is None:
+            print(f"{filename}: saved by an older version, no metadata")
+        else:
+            saved_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(metadata.timestamp))
+            print(
+                f"{filename}: version {metadata.version}, floor {metadata.floor}, "
+                f"level {metadata.level}, turn {metadata.turn}, saved {saved_at}"
+            )
+
+
+if __name__ == "__main__":
+    main()
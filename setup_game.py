@@ -1,25 +1,41 @@
 """Handle the loading and initialization of game sessions"""
 from __future__ import annotations
 
-import copy
-import lzma
-import pickle
+import functools
+import os
+import time
 import traceback
 from typing import Optional
 
+import numpy as np  # type: ignore
 import tcod
 import color
 from engine import Engine
 import entity_factories
 from game_map import GameWorld
 import input_handlers
+from message_log import MessageLog
+import savefile
 
-# Load the background image and remove the alpha channel
-background_image = tcod.image.load("TitleScreen.png")[:, :, :3]
 
+@functools.lru_cache(maxsize=None)
+def get_background_image() -> np.ndarray:
+    """Load the background image and remove the alpha channel.
+    This is only done when the main menu is first shown, so sessions without a window never load it."""
+    return tcod.image.load("TitleScreen.png")[:, :, :3]
 
-def new_game() -> Engine:
-    """Return a brand new game session as an Engine instance"""
+
+def new_game(
+        seed: Optional[int] = None,
+        pregenerate_floors: bool = False,
+        message_history: Optional[str] = None,
+) -> Engine:
+    """Return a brand new game session as an Engine instance
+
+    Games started with the same `seed` have the same dungeon, a random seed is used if it's None.
+    If `pregenerate_floors` is True then each next floor is made in the background ahead of time.
+    If `message_history` is given then old messages are kept in that file instead of being dropped.
+    """
     map_width = 80
     map_height = 43
 
@@ -27,9 +43,10 @@ def new_game() -> Engine:
     room_min_size = 6
     max_rooms = 30
 
-    player = copy.deepcopy(entity_factories.player)
+    player = entity_factories.player.clone()
 
     engine = Engine(player=player)
+    engine.message_log = MessageLog(history_path=message_history)
 
     engine.game_world = GameWorld(
         engine=engine,
@@ -38,17 +55,18 @@ def new_game() -> Engine:
         room_max_size=room_max_size,
         map_width=map_width,
         map_height=map_height,
-
+        seed=seed,
+        pregenerate_floors=pregenerate_floors,
     )
-    engine.game_world.generate_floor()
+    engine.game_world.descend()
     engine.update_fov()
 
     engine.message_log.add_message(
         "Hello and welcome, adventurer, to yet another dungeon!", color.welcome_text
     )
 
-    dagger = copy.deepcopy(entity_factories.dagger)
-    leather_armor = copy.deepcopy(entity_factories.leather_armor)
+    dagger = entity_factories.dagger.clone()
+    leather_armor = entity_factories.leather_armor.clone()
 
     dagger.parent = player.inventory
     leather_armor.parent = player.inventory
@@ -64,8 +82,8 @@ def new_game() -> Engine:
 
 def load_game(filename: str) -> Engine:
     """Load an Engine instance from a file"""
-    with open(filename, "rb") as f:
-        engine = pickle.loads(lzma.decompress(f.read()))
+    # Windows can't replace a file while it's mapped, which saving the game again does.
+    engine = savefile.load(filename, mmap_arrays=os.name != "nt")
     assert isinstance(engine, Engine)
     return engine
 
@@ -73,9 +91,33 @@ def load_game(filename: str) -> Engine:
 class MainMenu(input_handlers.BaseEventHandler):
     """Handle the main menu rendering and input"""
 
+    def __init__(self, save_filename: str = "savegame.sav"):
+        self.save_filename = save_filename
+        # The save is only checked, not loaded, to describe it and tell whether it can be loaded.
+        self.save_metadata: Optional[savefile.SaveMetadata] = None
+        self.save_error: Optional[str] = None  # Why the save can't be loaded, on one line
+        try:
+            self.save_metadata = savefile.read_metadata(save_filename)
+        except FileNotFoundError:
+            self.save_error = "No saved game to load"
+        except (OSError, savefile.SaveFileError) as exc:
+            self.save_error = f"Failed to load save: {exc}"
+
+    def describe_save(self) -> str:
+        """Return a line about the saved game, for the menu"""
+        if self.save_error is not None:
+            return self.save_error
+        if self.save_metadata is None:
+            return ""
+        saved_at = time.strftime("%Y-%m-%d %H:%M", time.localtime(self.save_metadata.timestamp))
+        return (
+            f"Floor {self.save_metadata.floor}, level {self.save_metadata.level}, "
+            f"turn {self.save_metadata.turn}, saved {saved_at}"
+        )
+
     def on_render(self, console: tcod.Console) -> None:
         """Render the main menu on a background image"""
-        console.draw_semigraphics(background_image, 0, 0)
+        console.draw_semigraphics(get_background_image(), 0, 0)
 
         console.print(
             console.width // 2,
@@ -110,6 +152,18 @@ class MainMenu(input_handlers.BaseEventHandler):
                 bg_blend=tcod.BKGND_ALPHA(64),
             )
 
+        save_description = self.describe_save()
+        if save_description:
+            console.print(
+                console.width // 2,
+                console.height // 2 + 2,
+                save_description,
+                fg=color.menu_text,
+                bg=color.black,
+                alignment=tcod.CENTER,
+                bg_blend=tcod.BKGND_ALPHA(64),
+            )
+
     def ev_keydown(
             self, event: tcod.event.KeyDown
     ) -> Optional[input_handlers.BaseEventHandler]:
@@ -117,14 +171,18 @@ class MainMenu(input_handlers.BaseEventHandler):
         if event.sym in (tcod.event.K_q, tcod.event.K_ESCAPE):
             raise SystemExit()
         elif event.sym == tcod.event.K_c:
+            if self.save_error is not None:  # Known without loading the whole save.
+                return input_handlers.PopupMessage(self, self.save_error)
             try:
-                return input_handlers.MainGameEventHandler(load_game("savegame.sav"))
+                return input_handlers.MainGameEventHandler(load_game(self.save_filename))
             except FileNotFoundError:
                 return input_handlers.PopupMessage(self, "No saved game to load")
             except Exception as exc:
                 traceback.print_exc()  # Print to stderr
                 return input_handlers.PopupMessage(self, f"Failed to load save:\n{exc}")
         elif event.sym == tcod.event.K_n:
-            return input_handlers.MainGameEventHandler(new_game())
+            engine = new_game(pregenerate_floors=True, message_history="savegame.history")
+            engine.autosave_filename = self.save_filename
+            return input_handlers.MainGameEventHandler(engine)
 
         return None
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Play many seeded games at once, to tune the balance of the game
+
+Games are spread across a pool of processes and each one is played by a
+scripted player policy.  Results are reported as soon as each game finishes.
+"""
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import os
+import random
+import time
+from typing import Callable, Dict, Iterator, NamedTuple, Optional
+
+import numpy as np  # type: ignore
+import tcod
+
+from actions import Action, BumpAction, TakeStairsAction, WaitAction
+from headless import HeadlessSession
+import input_handlers
+import setup_game
+
+Policy = Callable[[HeadlessSession], Action]
+"""A scripted player: given the session, return the player's next action"""
+
+
+class GameResult(NamedTuple):
+    """How a simulated game went"""
+    seed: int
+    floor: int  # Deepest floor reached
+    turns: int
+    kills: int
+    cause_of_death: Optional[str]  # None if the player survived until the turn limit
+    seconds: float
+
+
+def wander(session: HeadlessSession) -> Action:
+    """Policy wandering at random, attacking whatever is in the way"""
+    dx, dy = random.choice(list(input_handlers.MOVE_KEYS.values()))
+    return BumpAction(session.player, dx, dy)
+
+
+def descend(session: HeadlessSession) -> Action:
+    """Policy heading straight for the stairs, fighting any enemy next to the player on the way"""
+    player = session.player
+    game_map = session.engine.game_map
+
+    for dx, dy in input_handlers.MOVE_KEYS.values():
+        if game_map.get_actor_at_location(player.x + dx, player.y + dy):
+            return BumpAction(player, dx, dy)
+
+    if (player.x, player.y) == game_map.downstairs_location:
+        return TakeStairsAction(player)
+
+    # Walk down a distance map rooted at the stairs.
+    distance = tcod.path.maxarray((game_map.width, game_map.height), dtype=np.int32, order="F")
+    distance[game_map.downstairs_location] = 0
+    tcod.path.dijkstra2d(distance, game_map.pathing_cost, 2, 3, out=distance)
+    path = tcod.path.hillclimb2d(distance, (player.x, player.y), True, True)
+    if len(path) > 1:
+        return BumpAction(player, int(path[1][0]) - player.x, int(path[1][1]) - player.y)
+    return WaitAction(player)
+
+
+POLICIES: Dict[str, Policy] = {
+    "wander": wander,
+    "descend": descend,
+}
+
+
+def play_game(seed: int, policy: Policy, max_turns: int) -> GameResult:
+    """Play a whole game with the given policy, until the player dies or `max_turns` have passed"""
+    start_time = time.perf_counter()
+    random.seed(seed)  # For the policies
+    session = HeadlessSession(setup_game.new_game(seed=seed))
+    kills = 0
+    attempts = 0
+
+    while session.turns < max_turns and not session.is_over and attempts < max_turns * 10:
+        attempts += 1  # Keeps a policy which only returns impossible actions from looping forever.
+        if session.player.level.requires_level_up:
+            session.player.level.increase_max_hp()
+
+        game_map = session.engine.game_map
+        enemies_before = count_living_enemies(session)
+        session.perform(policy(session))
+        if session.engine.game_map is game_map:
+            kills += enemies_before - count_living_enemies(session)
+
+    return GameResult(
+        seed=seed,
+        floor=session.engine.game_world.current_floor,
+        turns=session.turns,
+        kills=kills,
+        cause_of_death=get_cause_of_death(session) if session.is_over else None,
+        seconds=time.perf_counter() - start_time,
+    )
+
+
+def count_living_enemies(session: HeadlessSession) -> int:
+    """Return the number of living actors on the current floor other than the player, asleep or not"""
+    return int(np.count_nonzero(session.engine.game_map.store.alive)) - session.player.is_alive
+
+
+def get_cause_of_death(session: HeadlessSession) -> str:
+    """Return the message logged just before the player died"""
+    messages = session.engine.message_log.messages
+    for i in range(len(messages) - 1, 0, -1):
+        if messages[i].plain_text == "You died!":
+            return messages[i - 1].plain_text
+    return "unknown"
+
+
+def run_batch(
+        seeds: Iterator[int], policy: Policy, max_turns: int, workers: Optional[int] = None,
+) -> Iterator[GameResult]:
+    """Play a game for every seed across a pool of `workers` processes.
+
+    Results are yielded in the order the games finish.
+    """
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(play_game, seed, policy, max_turns) for seed in seeds]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+
+def main() -> None:
+    """Run a batch of games from the command line and print the results as they come"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=100, help="number of games to play")
+    parser.add_argument("--first-seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--max-turns", type=int, default=2000, help="turn limit of each game")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="descend")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of processes")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    seeds = iter(range(args.first_seed, args.first_seed + args.games))
+    for result in run_batch(seeds, POLICIES[args.policy], args.max_turns, args.workers):
+        print(
+            f"seed={result.seed} floor={result.floor} turns={result.turns} kills={result.kills} "
+            f"death={result.cause_of_death!r} ({result.seconds:.2f}s)",
+            flush=True,
+        )
+    elapsed = time.perf_counter() - start_time
+
+    print(f"{args.games} games in {elapsed:.2f}s: {args.games / elapsed:.1f} games/second")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Write the save used by the tests of old saves, with the game as it was before save files had a format
+
+Run it from a checkout of the baseline commit: python make_baseline_save.py baseline.sav
+The game is made the way new_game did back then, then played a little so the save
+holds a corpse, a confused monster, stacked messages and an item in the inventory.
+"""
+import copy
+import random
+import sys
+
+import color
+from components.ai import ConfusedEnemy
+from engine import Engine
+import entity_factories
+from game_map import GameWorld
+
+random.seed(1234)
+player = copy.deepcopy(entity_factories.player)
+engine = Engine(player=player)
+engine.game_world = GameWorld(
+    engine=engine, max_rooms=30, room_min_size=6, room_max_size=10, map_width=80, map_height=43
+)
+engine.game_world.generate_floor()
+engine.update_fov()
+engine.message_log.add_message(
+    "Hello and welcome, adventurer, to yet another dungeon!", color.welcome_text
+)
+for prototype in (entity_factories.dagger, entity_factories.leather_armor):
+    item = copy.deepcopy(prototype)
+    item.parent = player.inventory
+    player.inventory.items.append(item)
+    player.equipment.toggle_equip(item, add_message=False)
+potion = copy.deepcopy(entity_factories.health_potion)
+potion.parent = player.inventory
+player.inventory.items.append(potion)
+
+engine.game_world.generate_floor()  # Play on the second floor
+engine.update_fov()
+monsters = sorted((a for a in engine.game_map.actors if a is not player), key=lambda a: (a.x, a.y))
+monsters[0].fighter.hp = 0  # Leaves a corpse
+monsters[1].ai = ConfusedEnemy(monsters[1], monsters[1].ai, 5)
+for _ in range(3):
+    engine.message_log.add_message("You wait.")
+player.level.add_xp(10)
+engine.save_as(sys.argv[1])
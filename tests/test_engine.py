@@ -0,0 +1,27 @@
+"""Tests of the engine's turns"""
+import os
+
+import savefile
+import setup_game
+
+
+def test_autosave(tmp_path) -> None:
+    engine = setup_game.new_game(seed=0)
+    engine.autosave_filename = str(tmp_path / "autosave.sav")
+    engine.autosave_interval = 2
+    engine.end_turn()
+    engine.end_turn()
+    savefile.background_saver.wait()
+    assert savefile.read_metadata(engine.autosave_filename).turn == 2
+
+
+def test_no_autosave_once_dead(tmp_path) -> None:
+    engine = setup_game.new_game(seed=0)
+    engine.autosave_filename = str(tmp_path / "autosave.sav")
+    engine.autosave_interval = 1
+    engine.player.fighter.hp = 0
+    assert not engine.player.is_alive
+    engine.end_turn()
+    savefile.background_saver.wait()
+    assert engine.turn == 1
+    assert not os.path.exists(engine.autosave_filename)
@@ -0,0 +1,26 @@
+"""Tests of the columnar store of a map's entities"""
+import numpy as np  # type: ignore
+
+import entity_factories
+from entity_store import EntityStore
+from render_order import RenderOrder
+
+
+def test_visible_in_render_order() -> None:
+    store = EntityStore(capacity=2)
+    slime = entity_factories.slime.clone()
+    potion = entity_factories.health_potion.clone()
+    hidden = entity_factories.health_potion.clone()
+    corpse = entity_factories.slime.clone()
+    for entity, x in ((slime, 1), (potion, 1), (hidden, 5), (corpse, 2)):
+        entity.x, entity.y = x, 1
+        store.add(entity)
+    visible = np.zeros((8, 8), dtype=bool)
+    visible[:4] = True
+
+    # Actors are drawn last, over anything else on their tile.
+    assert store.visible_in_render_order(visible) == [potion, slime, corpse]
+    store.set_render_order(corpse, RenderOrder.CORPSE.value)
+    assert store.visible_in_render_order(visible) == [corpse, potion, slime]
+    store.remove(potion)
+    assert store.visible_in_render_order(visible) == [corpse, slime]
@@ -0,0 +1,74 @@
+"""Tests of the pickling of the classes using __slots__, including from saves made before they did"""
+import os
+import pickle
+
+from components.fighter import Fighter
+import entity_factories
+from entity import Actor, Item
+from message_log import Message
+from render_order import RenderOrder
+import savefile
+
+BASELINE_SAVE = os.path.join(os.path.dirname(__file__), "data", "baseline.sav")
+
+
+def test_message_round_trip() -> None:
+    message = Message("You wait.", (255, 255, 255))
+    message.count = 3
+    message.get_lines(10)
+    loaded = pickle.loads(pickle.dumps(message))
+    assert (loaded.plain_text, loaded.fg, loaded.count) == ("You wait.", (255, 255, 255), 3)
+    assert loaded.get_lines(40) == ["You wait. (x3)"]
+
+
+def test_message_from_dict_state() -> None:
+    message = Message.__new__(Message)
+    message.__setstate__({"plain_text": "Hello", "fg": (1, 2, 3), "count": 2})
+    assert message.full_text == "Hello (x2)"
+    assert message.get_lines(40) == ["Hello (x2)"]
+
+
+def test_entity_from_dict_state() -> None:
+    item = Item.__new__(Item)
+    item.__setstate__({
+        "x": 3, "y": 4, "char": "!", "color": (1, 2, 3), "name": "Potion",
+        "blocks_movement": False, "render_order": RenderOrder.ITEM, "consumable": None,
+        "equippable": None, "inscription_slots": 0, "inscription_slot1": "", "inscription_slot2": "",
+    })
+    assert (item.x, item.y, item.name) == (3, 4, "Potion")
+    assert item.blocks_movement is False
+    assert item.render_order is RenderOrder.ITEM
+
+
+def test_component_from_dict_state() -> None:
+    fighter = Fighter.__new__(Fighter)
+    fighter.__setstate__({
+        "max_hp": 30, "_hp": 12, "base_constitution": 1, "base_strength": 2,
+        "base_agility": 3, "base_intelligence": 4,
+    })
+    assert (fighter.hp, fighter.max_hp, fighter.base_agility) == (12, 30, 3)
+
+
+def test_actor_round_trip() -> None:
+    slime = entity_factories.slime.clone()
+    loaded = pickle.loads(pickle.dumps(slime))
+    assert isinstance(loaded, Actor)
+    assert loaded.fighter.parent is loaded
+    assert (loaded.name, loaded.fighter.hp) == (slime.name, slime.fighter.hp)
+    assert loaded.render_order is RenderOrder.ACTOR
+
+
+def test_baseline_save_slotted_objects() -> None:
+    engine = savefile.load(BASELINE_SAVE)
+    player = engine.player
+    assert (player.x, player.y) == (66, 13)
+    assert player.blocks_movement is True
+    assert player.fighter.parent is player
+    assert player.fighter.hp == player.fighter.max_hp
+    assert player.level.current_level == 1 and player.level.requires_level_up
+    assert [item.name for item in player.inventory.items] == ["Dagger", "Leather Armor", "Healing Potion"]
+    assert player.equipment.left_hnd_wpn is player.inventory.items[0]
+
+    texts = [message.full_text for message in engine.message_log.messages]
+    assert "You wait. (x3)" in texts
+    assert all(message.get_lines(40) for message in engine.message_log.messages)
@@ -0,0 +1,189 @@
+"""Tests of loading save files, including the pickle+LZMA saves from before the save file format"""
+import os
+
+import numpy as np  # type: ignore
+import pytest
+from tcod.console import Console
+
+import actions
+from entity import Actor
+import exceptions
+import savefile
+import setup_game
+import tile_types
+
+BASELINE_SAVE = os.path.join(os.path.dirname(__file__), "data", "baseline.sav")
+
+
+def test_baseline_save_map() -> None:
+    engine = setup_game.load_game(BASELINE_SAVE)
+    game_map = engine.game_map
+    assert engine.game_world.current_floor == 2
+    assert engine.player in game_map.entities
+    assert game_map.tiles.dtype == tile_types.tile_id_dt
+    assert game_map.tiles[game_map.downstairs_location] == tile_types.down_stairs
+    assert game_map.upstairs_location is None
+
+    # The indexes the map keeps of its entities were built from them.
+    assert len(game_map.store) == len(game_map.entities)
+    for entity in game_map.entities:
+        assert entity in game_map.get_entities_at_location(entity.x, entity.y)
+    blocking = [entity for entity in game_map.entities if entity.blocks_movement]
+    assert game_map.blockers.sum() == len(blocking)
+    enemies = {actor for actor in game_map.actors if actor is not engine.player}
+    assert len(game_map.scheduler) + len(game_map.scheduler.dormant) == len(enemies)
+    corpses = [entity for entity in game_map.entities if isinstance(entity, Actor) and not entity.is_alive]
+    assert len(corpses) == 1
+    assert corpses[0].name.startswith("remains of ")
+
+
+def test_baseline_save_plays() -> None:
+    engine = setup_game.load_game(BASELINE_SAVE)
+    engine.update_fov()
+    assert engine.game_map.visible[engine.player.x, engine.player.y]
+    engine.render(Console(80, 50, order="F"))
+
+    player = engine.player
+    for dx, dy in [(1, 0), (0, 1), (-1, 0), (0, -1)] * 3:
+        try:
+            actions.BumpAction(player, dx, dy).perform()
+        except exceptions.Impossible:
+            pass  # Walked into a wall.
+        engine.handle_enemy_turns()
+        engine.update_fov()
+        engine.end_turn()
+    assert engine.turn == 12
+
+    player.place(*engine.game_map.downstairs_location)
+    actions.TakeStairsAction(player).perform()
+    assert engine.game_world.current_floor == 3
+    actions.TakeStairsAction(player).perform()  # Arrived on the up stairs
+    assert engine.game_world.current_floor == 2
+
+
+def test_baseline_save_upgrades() -> None:
+    engine = setup_game.load_game(BASELINE_SAVE)
+    loaded = savefile.loads(savefile.dumps(engine))
+    assert len(loaded.game_map.entities) == len(engine.game_map.entities)
+    assert np.array_equal(loaded.game_map.tiles, engine.game_map.tiles)
+    assert np.array_equal(loaded.game_map.explored, engine.game_map.explored)
+    assert [m.full_text for m in loaded.message_log.messages] == [
+        m.full_text for m in engine.message_log.messages
+    ]
+
+
+def test_tile_ids_follow_tile_names() -> None:
+    engine = setup_game.new_game(seed=0)
+    game_map = engine.game_map
+    state = game_map.__getstate__()
+    # As saved by a game which defined the same tiles in the opposite order
+    last_id = len(tile_types.names) - 1
+    state["tile_names"] = tile_types.names[::-1]
+    state["_tiles"] = (last_id - game_map.tiles).astype(tile_types.tile_id_dt)
+
+    loaded = type(game_map).__new__(type(game_map))
+    loaded.__setstate__(state)
+    assert np.array_equal(loaded.tiles, game_map.tiles)
+
+    state["tile_names"] = [*tile_types.names[:-1], "lava"]
+    with pytest.raises(ValueError, match="lava"):
+        type(game_map).__new__(type(game_map)).__setstate__(state)
+
+
+def test_unknown_legacy_tiles() -> None:
+    records = tile_types.tiles[[tile_types.wall, tile_types.floor]].copy()
+    assert list(tile_types.to_ids(records)) == [tile_types.wall, tile_types.floor]
+    records[1]["light"]["ch"] = ord("~")
+    with pytest.raises(ValueError, match="1 tiles"):
+        tile_types.to_ids(records)
+
+
+def test_damaged_save(tmp_path) -> None:
+    filename = str(tmp_path / "damaged.sav")
+    engine = setup_game.new_game(seed=0)
+    engine.save_as(filename)
+    assert savefile.read_metadata(filename).floor == 1
+
+    with open(filename, "r+b") as f:
+        data = f.read()
+        f.seek(len(data) - 100)  # Inside the last block
+        f.write(bytes([data[-100] ^ 0xFF]))
+    with pytest.raises(savefile.SaveFileError, match="damaged"):
+        savefile.read_metadata(filename)
+    with pytest.raises(savefile.SaveFileError, match="damaged"):
+        savefile.load(filename)
+    assert "damaged" in setup_game.MainMenu(filename).describe_save()
+
+
+def test_journaled_save_after_save_as(tmp_path) -> None:
+    filename = str(tmp_path / "autosave.sav")
+    engine = setup_game.new_game(seed=0)
+    engine.turn = 15
+    engine.save_in_background(filename)
+    engine.save_as(filename)
+    engine.turn = 20
+    engine.save_in_background(filename).result()
+    assert savefile.read_metadata(filename).turn == 20
+    assert savefile.load(filename).turn == 20
+
+
+def test_journaled_save_after_file_replaced(tmp_path) -> None:
+    filename = str(tmp_path / "autosave.sav")
+    journal = savefile.JournaledSave(filename)
+    journal.write(savefile.Snapshot([1], turn=1))
+    journal.write(savefile.Snapshot([2], turn=2))
+    savefile.Snapshot([3], turn=3).write(filename)  # Not through the JournaledSave
+    journal.write(savefile.Snapshot([4], turn=4))
+    assert savefile.read_metadata(filename).turn == 4
+    assert savefile.load(filename) == [4]
+
+
+class CountingFileBlock(savefile.FileBlock):
+    """FileBlock counting how many times it's read"""
+
+    def __init__(self, filename: str, key: bytes):
+        super().__init__(filename, key)
+        self.reads = 0
+
+    def read(self) -> bytes:
+        self.reads += 1
+        return super().read()
+
+
+def test_journaled_file_blocks(tmp_path) -> None:
+    filename = str(tmp_path / "pages.sav")
+    pages = [os.urandom(1000) for _ in range(3)]
+    blocks = []
+    for i, page in enumerate(pages):
+        (tmp_path / f"page{i}").write_bytes(page)
+        blocks.append(CountingFileBlock(str(tmp_path / f"page{i}"), key=bytes([i])))
+
+    journal = savefile.JournaledSave(filename)
+    journal.write(savefile.Snapshot(blocks[:2]))
+    assert [block.reads for block in blocks] == [1, 1, 0]
+    # The pages already saved are neither read nor written again, even once they moved.
+    journal.write(savefile.Snapshot([blocks[2], *blocks[:2]]))
+    assert [block.reads for block in blocks] == [1, 1, 1]
+    assert os.path.getsize(f"{filename}.journal") < 1500
+    for block in blocks:
+        block.close()
+    assert [bytes(page) for page in savefile.load(filename)] == [pages[2], *pages[:2]]
+
+
+def test_paged_floors_saved(tmp_path) -> None:
+    filename = str(tmp_path / "deep.sav")
+    engine = setup_game.new_game(seed=0)
+    for _ in range(4):
+        engine.player.place(*engine.game_map.downstairs_location)
+        actions.TakeStairsAction(engine.player).perform()
+    assert engine.game_world.floors.paged_floors == {1, 2}
+    engine.save_in_background(filename)
+    engine.save_as(filename)
+    engine.save_in_background(filename).result()
+
+    loaded = savefile.load(filename)
+    assert loaded.game_world.floors.paged_floors == {1, 2}
+    for floor in range(4, 0, -1):
+        loaded.player.place(*loaded.game_map.upstairs_location)
+        actions.TakeStairsAction(loaded.player).perform()
+        assert loaded.game_world.current_floor == floor
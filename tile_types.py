@@ -1,5 +1,5 @@
 """File defining tiles found in the game"""
-from typing import Tuple
+from typing import Dict, List, Sequence, Tuple
 import numpy as np
 
 graphic_dt = np.dtype(
@@ -19,22 +19,71 @@ tile_dt = np.dtype(
     ]
 )
 
+tile_id_dt = np.dtype(np.uint8)  # Index of a tile in `tiles`
+
+
+# Every kind of tile, indexed by tile id.  Maps only store the ids of their tiles,
+# the rest is looked up from here, see `lookup`.
+tiles = np.zeros(0, dtype=tile_dt)
+# Name of each kind of tile, indexed by tile id.  Saved with maps since ids change
+# when tiles are added or reordered, see `remap_ids`.
+names: List[str] = []
+ids: Dict[str, int] = {}
+
 
 def new_tile(
         *,
+        name: str,
         walkable: int,
         transparent: int,
         dark: Tuple[int, Tuple[int, int, int], Tuple[int, int, int]],
         light: Tuple[int, Tuple[int, int, int], Tuple[int, int, int]],
-) -> np.ndarray:
-    """Returns the characteristic of hte desired tile"""
-    return np.array((walkable, transparent, dark, light), dtype=tile_dt)
+) -> int:
+    """Registers a new kind of tile under a unique name and returns its id"""
+    global tiles
+    if len(tiles) > np.iinfo(tile_id_dt).max:
+        raise ValueError("There are too many kinds of tiles for their ids")
+    if name in ids:
+        raise ValueError(f"There already is a tile named {name!r}")
+    tiles = np.append(tiles, np.array((walkable, transparent, dark, light), dtype=tile_dt))
+    names.append(name)
+    ids[name] = len(tiles) - 1
+    return ids[name]
+
+
+def lookup(tile_ids: np.ndarray, field: str) -> np.ndarray:
+    """Returns a field of tile_dt for each of the given tile ids, e.g. the "walkable" tiles of a map"""
+    return tiles[field][tile_ids]
+
+
+def remap_ids(tile_ids: np.ndarray, saved_names: Sequence[str]) -> np.ndarray:
+    """Returns tile ids saved when the tiles had the given names, as the ids of the same tiles now"""
+    if list(saved_names) == names:
+        return tile_ids
+    unknown = [name for name in saved_names if name not in ids]
+    if unknown:
+        raise ValueError(f"Unknown tiles: {', '.join(unknown)}")
+    return np.array([ids[name] for name in saved_names], dtype=tile_id_dt)[tile_ids]
+
+
+def to_ids(records: np.ndarray) -> np.ndarray:
+    """Returns the ids of an array of tile_dt records, which is how maps stored their tiles before"""
+    tile_ids = np.zeros(records.shape, dtype=tile_id_dt, order="F")
+    known = np.zeros(records.shape, dtype=bool)
+    for tile_id, tile in enumerate(tiles):
+        matches = records == tile
+        tile_ids[matches] = tile_id
+        known |= matches
+    if not known.all():
+        raise ValueError(f"Unknown tiles: {np.count_nonzero(~known)} tiles match no kind of tile")
+    return tile_ids
 
 
 # SHROUD represents unexplored, unseen tiles
 SHROUD = np.array((ord(" "), (255, 255, 255), (0, 0, 0)), dtype=graphic_dt)
 
 floor = new_tile(
+    name="floor",
     walkable=True,
     transparent=True,
     dark=(ord("."), (127, 127, 127), (0, 0, 0)),
@@ -42,6 +91,7 @@ floor = new_tile(
 )
 
 wall = new_tile(
+    name="wall",
     walkable=False,
     transparent=False,
     dark=(ord("#"), (127, 127, 127), (0, 0, 0)),
@@ -49,8 +99,17 @@ wall = new_tile(
 )
 
 down_stairs = new_tile(
+    name="down_stairs",
     walkable=True,
     transparent=True,
     dark=(ord(">"), (0, 0, 100), (50, 50, 150)),
     light=(ord(">"), (255, 255, 255), (200, 180, 50)),
 )
+
+up_stairs = new_tile(
+    name="up_stairs",
+    walkable=True,
+    transparent=True,
+    dark=(ord("<"), (0, 0, 100), (50, 50, 150)),
+    light=(ord("<"), (255, 255, 255), (200, 180, 50)),
+)
@@ -0,0 +1,85 @@
+"""File defining the order in which actors take their turns"""
+from __future__ import annotations
+
+import heapq
+from typing import Dict, Iterator, List, Set, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from entity import Actor
+
+NORMAL_SPEED = 100
+ACTION_TIME = 100  # Time taken by an action of an actor with NORMAL_SPEED
+
+
+def action_delay(actor: Actor) -> int:
+    """Return the time the given actor needs to take an action.
+    Faster actors need less time, so they act more often."""
+    return max(1, ACTION_TIME * NORMAL_SPEED // max(1, actor.speed))
+
+
+class TurnScheduler:
+    """Priority queue of actors, keyed by the time at which they act next.
+
+    Ties are broken by the order in which actors were scheduled, so turns are
+    always taken in the same order.
+
+    Actors can also be put to sleep: dormant actors are kept aside and cost
+    nothing until they are woken up again.
+    """
+
+    def __init__(self) -> None:
+        self.time = 0
+        self._queue: List[list] = []  # Heap of [next_time, sequence, actor or None]
+        self._entries: Dict[Actor, list] = {}
+        self._sequence = 0  # Increases with every push, to break ties in order
+        self.dormant: Set[Actor] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, actor: Actor) -> None:
+        """Schedule an actor to act once its action delay has passed."""
+        self._push(actor, self.time + action_delay(actor))
+
+    def remove(self, actor: Actor) -> None:
+        """Stop scheduling an actor, if it was scheduled or dormant."""
+        self.dormant.discard(actor)
+        entry = self._entries.pop(actor, None)
+        if entry is not None:
+            entry[-1] = None  # Left in the heap, skipped when popped.
+
+    def sleep(self, actor: Actor) -> None:
+        """Make a scheduled actor dormant.  It won't act until woken up."""
+        self.remove(actor)
+        self.dormant.add(actor)
+
+    def wake(self, actor: Actor) -> None:
+        """Schedule a dormant actor again.  Does nothing if the actor isn't dormant."""
+        if actor in self.dormant:
+            self.dormant.remove(actor)
+            self.add(actor)
+
+    def _push(self, actor: Actor, next_time: int) -> None:
+        """Add an entry for the actor to the queue."""
+        self._sequence += 1
+        entry = [next_time, self._sequence, actor]
+        self._entries[actor] = entry
+        heapq.heappush(self._queue, entry)
+
+    def advance(self, duration: int) -> Iterator[Actor]:
+        """Move time forward by `duration` and yield every actor due to act in that time, in order.
+
+        Each yielded actor is already rescheduled for its next action.
+        Only actors which are due are touched.
+        """
+        self.time += duration
+        queue = self._queue
+        while queue and queue[0][0] <= self.time:
+            next_time, _, actor = heapq.heappop(queue)
+            if actor is None:
+                continue  # This actor was removed.
+            if not actor.is_alive:
+                del self._entries[actor]
+                continue
+            self._push(actor, next_time + action_delay(actor))
+            yield actor